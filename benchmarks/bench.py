@@ -0,0 +1,230 @@
+"""
+Benchmarks for fieldmarshal, with cattrs and the standard library json module
+as baselines.
+
+Usage:
+
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/bench.py -o results.json
+    python -m pyperf compare_to before.json results.json
+
+Run ``python benchmarks/bench.py --help`` for all pyperf options, such as
+``--fast`` for a quick run. ``--case NAME`` (which can be repeated) runs only
+the given benchmark cases. cattrs benchmarks are skipped if cattrs is not
+installed, or if it can't round-trip the data of a benchmark.
+
+Every benchmark case provides JSON-compatible data and a type hint. For each
+case, the following benchmarks are run:
+
+-   ``<case>.fieldmarshal.marshal`` / ``.unmarshal``: :mod:`fieldmarshal`
+-   ``<case>.cattrs.unstructure`` / ``.structure``: :mod:`cattrs`
+-   ``<case>.json.dumps`` / ``.loads``: :mod:`json` on the same data, as a
+    lower bound for the JSON encoding step.
+"""
+import importlib.util
+import json
+import os
+import sys
+from datetime import datetime
+from enum import Enum, IntEnum
+from typing import Dict, List, Optional, Union
+
+import attr
+import pyperf
+
+from fieldmarshal import Registry, field, struct
+
+try:
+    import cattrs
+    from cattrs.gen import make_dict_structure_fn, make_dict_unstructure_fn, override
+except ImportError:
+    cattrs = None
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Color(Enum):
+    RED = 'red'
+    GREEN = 'green'
+    BLUE = 'blue'
+
+
+class Priority(IntEnum):
+    LOW = 1
+    HIGH = 2
+
+
+@struct
+class Flat:
+    id: int
+    name: str
+    score: float
+    active: bool
+    note: str = field('Note')
+
+
+@struct
+class Node:
+    value: int
+    child: Optional['Node'] = None
+
+
+attr.resolve_types(Node)
+
+
+@struct
+class Metric:
+    count: int
+    total: float
+
+
+@struct
+class Colored:
+    color: Color
+    priority: Priority
+    colors: List[Color]
+
+
+@struct
+class Point:
+    x: int
+    y: int
+
+
+@struct
+class WithOptional:
+    id: int
+    name: Optional[str]
+    value: Union[int, str]
+    point: Optional[Point] = None
+
+
+def _load_hcloud():
+    path = os.path.join(ROOT, 'examples', 'hcloud', 'example.py')
+    spec = importlib.util.spec_from_file_location('hcloud_example', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    with open(os.path.join(ROOT, 'examples', 'hcloud', 'server.json')) as f:
+        data = json.load(f)
+    return module, data
+
+
+def _nested(depth):
+    data = {'value': depth}
+    for i in range(depth - 1, 0, -1):
+        data = {'value': i, 'child': data}
+    return data
+
+
+def make_cases():
+    """
+    Return a list of (name, type_hint, data, registry) tuples.
+    """
+    registry = Registry()
+    hcloud, server = _load_hcloud()
+    servers = [dict(server['server'], id=i) for i in range(100)]
+    return [
+        ('flat', List[Flat], [
+            {'id': i, 'name': 'item %d' % i, 'score': i / 3, 'active': i % 2 == 0,
+             'Note': 'x'}
+            for i in range(1000)
+        ], registry),
+        ('nested', List[Node], [_nested(20) for _ in range(50)], registry),
+        ('list_int', List[int], list(range(100000)), registry),
+        ('dict_int_keys', Dict[int, Metric], {
+            str(i): {'count': i, 'total': i * 1.5} for i in range(10000)
+        }, registry),
+        ('enums', List[Colored], [
+            {'color': 'red', 'priority': 2, 'colors': ['red', 'green', 'blue']}
+            for _ in range(1000)
+        ], registry),
+        ('optional_union', List[WithOptional], [
+            {'id': i, 'name': None if i % 2 else 'x', 'value': i if i % 3 else 'v',
+             'point': {'x': i, 'y': i} if i % 4 else None}
+            for i in range(1000)
+        ], registry),
+        ('hcloud_server', hcloud.ServerResponse, server, hcloud.registry),
+        ('hcloud_servers', List[hcloud.Server], servers, hcloud.registry),
+    ]
+
+
+def _cattrs_converter():
+    """
+    Return a cattrs converter that uses the same field names, datetime and
+    union handling as fieldmarshal.
+    """
+    converter = cattrs.Converter()
+    converter.register_structure_hook(datetime, lambda s, _: datetime.fromisoformat(s))
+    converter.register_unstructure_hook(datetime, lambda dt: dt.isoformat())
+    converter.register_structure_hook_func(
+        lambda t: getattr(t, '__origin__', None) is Union and type(None) not in t.__args__,
+        lambda obj, t: _structure_union(converter, obj, t),
+    )
+
+    def overrides(cls):
+        result = {}
+        for a in attr.fields(cls):
+            options = a.metadata.get('fieldmarshal')
+            if options is not None and options.name is not None:
+                result[a.name] = override(rename=options.name)
+        return result
+
+    converter.register_structure_hook_factory(
+        attr.has, lambda cls: make_dict_structure_fn(cls, converter, **overrides(cls)))
+    converter.register_unstructure_hook_factory(
+        attr.has, lambda cls: make_dict_unstructure_fn(cls, converter, **overrides(cls)))
+    return converter
+
+
+def _structure_union(converter, obj, type_hint):
+    # Resolve unions by JSON type, like fieldmarshal does.
+    for t in type_hint.__args__:
+        origin = getattr(t, '__origin__', None) or t
+        if type(obj) is origin or isinstance(obj, dict) and attr.has(t) or \
+                origin in {list, dict} and isinstance(obj, origin):
+            return converter.structure(obj, t)
+    raise ValueError("Can't structure %r as %s" % (obj, type_hint))
+
+
+def add_benchmarks(runner, name, type_hint, data, registry):
+    obj = registry.unmarshal(data, type_hint)
+    text = json.dumps(data)
+
+    runner.bench_func('%s.fieldmarshal.marshal' % name, registry.marshal, obj)
+    runner.bench_func('%s.fieldmarshal.unmarshal' % name, registry.unmarshal, data, type_hint)
+
+    if cattrs is not None:
+        try:
+            converter = _cattrs_converter()
+            if converter.structure(data, type_hint) != obj:
+                raise ValueError('result differs from fieldmarshal')
+        except Exception as e:
+            if not runner.args.worker:
+                print('%s: skipping cattrs (%s)' % (name, e), file=sys.stderr)
+        else:
+            runner.bench_func('%s.cattrs.unstructure' % name, converter.unstructure, obj)
+            runner.bench_func('%s.cattrs.structure' % name, converter.structure, data, type_hint)
+
+    runner.bench_func('%s.json.dumps' % name, json.dumps, data)
+    runner.bench_func('%s.json.loads' % name, json.loads, text)
+
+
+def _add_cmdline_args(cmd, args):
+    for name in args.case or ():
+        cmd.extend(('--case', name))
+
+
+def main():
+    runner = pyperf.Runner(add_cmdline_args=_add_cmdline_args)
+    runner.metadata['description'] = 'fieldmarshal benchmarks'
+    runner.argparser.add_argument(
+        '--case', action='append', help='Only run the given benchmark case')
+    args = runner.parse_args()
+    for case in make_cases():
+        if not args.case or case[0] in args.case:
+            add_benchmarks(runner, *case)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,23 +1,51 @@
-import sys
+import asyncio
+import codecs
 import json
+import mmap
+import os
+import pickle
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict
+from collections.abc import Mapping
 from enum import Enum, Flag, IntEnum, IntFlag
-from functools import singledispatch, wraps
-from typing import Any, List, Tuple, Set, FrozenSet, Dict, Union
+from functools import partial, singledispatch, wraps
+from types import MemberDescriptorType
+from json.encoder import encode_basestring_ascii
+from typing import Any, List, Tuple, Set, FrozenSet, Dict, Optional, Union
 
 import attr
 
 __version__ = '0.0.2'
 
 __all__ = [
+    'aiter_unmarshal',
+    'apply_patch',
+    'aunmarshal',
+    'aunmarshal_json',
+    'dump',
     'field',
+    'get_json_backend',
+    'iter_marshal_json',
+    'iter_unmarshal',
     'marshal',
+    'marshal_diff',
     'marshal_json',
+    'marshal_many',
     'struct',
     'unmarshal',
     'unmarshal_json',
+    'unmarshal_json_parallel',
+    'unmarshal_many',
 
+    'CacheInfo',
     'Hook',
+    'JsonBackend',
     'Options',
+    'ProfileEntry',
     'Registry',
 
     'DEFAULT_OPTIONS',
@@ -27,6 +55,10 @@ __all__ = [
 
 PY36 = sys.version_info[:2] == (3, 6)
 
+# Python 3.6 has no get_running_loop(), but inside a coroutine
+# get_event_loop() returns the running loop.
+get_running_loop = asyncio.get_event_loop if PY36 else asyncio.get_running_loop
+
 
 class MarshalError(TypeError): pass
 class UnmarshalError(TypeError): pass
@@ -64,6 +96,9 @@ class Options:
         field. The function will be passed the data being unmarshalled as its
         only argument. This hook overrides other unmarshal hooks registered for
         the field's type.
+    :param set_order: How to order the items when the field value is a
+        ``set`` or ``frozenset``, overriding the registry's ``set_order``.
+        See :class:`Registry`.
 
     For ``fieldmarshal`` to recognize these options, put the object into the
     field's ``metadata`` dict under the "fieldmarshal" key, or use the
@@ -74,9 +109,11 @@ class Options:
     omit_if_none: bool = False
     marshal: Any = None
     unmarshal: Any = None
+    set_order: Any = None
 
 
-def field(name=None, omit=False, omit_if_none=False, marshal=None, unmarshal=None, **kw):
+def field(name=None, omit=False, omit_if_none=False, marshal=None, unmarshal=None,
+          set_order=None, **kw):
     """
     Wrapper around ``attr.ib`` that accepts additional arguments.
 
@@ -84,6 +121,8 @@ def field(name=None, omit=False, omit_if_none=False, marshal=None, unmarshal=Non
     in the fields metadata under the "fieldmarshal" key. See
     :class:`Options` for the meaning of these parameters.
     """
+    if set_order is not None:
+        _make_marshal_set(set_order)
     metadata = kw.setdefault('metadata', {})
     metadata['fieldmarshal'] = Options(
         name,
@@ -91,6 +130,7 @@ def field(name=None, omit=False, omit_if_none=False, marshal=None, unmarshal=Non
         omit_if_none=omit_if_none,
         marshal=marshal,
         unmarshal=unmarshal,
+        set_order=set_order,
     )
     return attr.ib(**kw)
 
@@ -101,41 +141,132 @@ IDENTITY = object()
 
 NONE_TYPE = type(None)
 SCALAR_TYPES = {int, bool, float, str, NONE_TYPE}
+JSON_TYPES = (dict, list, str, int, float, bool, NONE_TYPE)
 
 
 def _marshal_default(obj, registry):
     raise MarshalError("Can't marshal %r" % obj)
 
 
-def _marshal_attrs(obj, registry):
-    data = {}
-    cls = obj.__class__
-    for field in cls.__attrs_attrs__:
-        key = (cls, field.name)
-        try:
-            options = registry._field_options_cache[key]
-        except KeyError:
-            options = field.metadata.get('fieldmarshal', DEFAULT_OPTIONS)
-            registry._field_options_cache[key] = options
-        if not options.omit:
-            name = field.name if options.name is None else options.name
-            value = getattr(obj, field.name)
-            if not (value is None and options.omit_if_none):
-                if options.marshal is not None:
-                    data[name] = options.marshal(value)
-                else:
-                    data[name] = registry.marshal(value)
-    return data
+def _compile(name, lines, namespace, filename):
+    """
+    Compile generated source code for a single function and return the
+    function object.
+    """
+    code = compile('\n'.join(lines) + '\n', filename, 'exec')
+    exec(code, namespace)
+    return namespace[name]
+
+
+def _compile_marshal_attrs(cls, registry):
+    """
+    Generate a marshal implementation specialized for the attrs class *cls*.
+
+    Field names, renames, ``omit``/``omit_if_none`` and per-field hooks are
+    resolved once, so marshalling an instance only needs to read the field
+    values and dispatch on their classes.
+    """
+    namespace = {'marshal': registry.marshal}
+    lines = ['def marshal_attrs(obj, registry):']
+    exprs = []
+    items = []
+    for i, field in enumerate(cls.__attrs_attrs__):
+        options = registry._get_field_options(cls, field)
+        if options.omit:
+            continue
+        name = field.name if options.name is None else options.name
+        if field.name.isidentifier():
+            getter = 'obj.%s' % field.name
+        else:
+            getter = 'getattr(obj, %r)' % field.name
+        if options.marshal is not None:
+            namespace['hook_%d' % i] = options.marshal
+            expr = 'hook_%d(v%d)' % (i, i)
+        elif options.set_order is not None:
+            namespace['marshal_set_%d' % i] = _make_marshal_set(options.set_order)
+            namespace['SETS'] = (set, frozenset)
+            expr = ('marshal_set_%d(v%d, registry) if v%d.__class__ in SETS else marshal(v%d)'
+                    % (i, i, i, i))
+        elif field.type in SCALAR_TYPES and \
+                registry.lookup_marshal_impl(field.type) is IDENTITY:
+            # Skip the dispatch for values that have exactly the declared
+            # type. Anything else (including subclasses) goes through marshal.
+            namespace['type_%d' % i] = field.type
+            expr = 'v%d if v%d.__class__ is type_%d else marshal(v%d)' % (i, i, i, i)
+        elif isinstance(field.type, type) and issubclass(field.type, Enum) and \
+                registry.lookup_marshal_impl(field.type) is _marshal_enum:
+            namespace['type_%d' % i] = field.type
+            expr = 'v%d._value_ if v%d.__class__ is type_%d else marshal(v%d)' % (i, i, i, i)
+        else:
+            expr = 'marshal(v%d)' % i
+        lines.append('    v%d = %s' % (i, getter))
+        exprs.append((name, expr, options.omit_if_none, i))
+        items.append((name, field.name, options))
+
+    # Tagged union members get the tag as their first key, unless one of the
+    # fields already uses the name.
+    tag = registry._marshal_tags.get(cls)
+    if tag is not None and tag[0] in {name for name, _, _ in items}:
+        tag = None
+    if tag is not None:
+        namespace['tag'] = tag[1]
+        exprs.insert(0, (tag[0], 'tag', False, None))
+
+    if any(omit_if_none for _, _, omit_if_none, _ in exprs):
+        lines.append('    data = {}')
+        for name, expr, omit_if_none, i in exprs:
+            if omit_if_none:
+                lines.append('    if v%d is not None:' % i)
+                lines.append('        data[%r] = %s' % (name, expr))
+            else:
+                lines.append('    data[%r] = %s' % (name, expr))
+        lines.append('    return data')
+    else:
+        lines.append('    return {%s}' % ', '.join(
+            '%r: %s' % (name, expr) for name, expr, _, _ in exprs))
+    filename = '<fieldmarshal marshal %s.%s>' % (cls.__module__, cls.__qualname__)
+    fn = _compile('marshal_attrs', lines, namespace, filename)
+    fn.attrs_fields = tuple(items)
+    fn.attrs_tag = tag
+    return fn
 
 
 def _marshal_list(obj, registry):
-    return [registry.marshal(item) for item in obj]
+    classes = set(map(type, obj))
+    if len(classes) == 1:
+        impl = registry._resolve_marshal_impl(classes.pop())
+        if impl is IDENTITY:
+            return list(obj)
+        return [impl(item, registry) for item in obj]
+    marshal = registry.marshal
+    return [marshal(item) for item in obj]
 
 
 def _marshal_set(obj, registry):
     return sorted([registry.marshal(item) for item in obj])
 
 
+def _marshal_set_unordered(obj, registry):
+    return _marshal_list(obj, registry)
+
+
+def _make_marshal_set(order):
+    """
+    Return the marshal impl for sets for the ordering policy *order*:
+    "sorted" sorts the marshalled items, "iteration" keeps the iteration
+    order of the set and a callable is used as the key function to sort the
+    items before they are marshalled.
+    """
+    if order == 'sorted':
+        return _marshal_set
+    elif order == 'iteration':
+        return _marshal_set_unordered
+    elif callable(order):
+        return lambda obj, registry: _marshal_list(sorted(obj, key=order), registry)
+    raise ValueError(
+        "set_order must be 'sorted', 'iteration' or a callable, got %r" % (order,))
+
+
 def _marshal_dict_key(key, registry):
     obj = registry.marshal(key)
 
@@ -143,6 +274,10 @@ def _marshal_dict_key(key, registry):
     #   stdlib json: "true", "false", "null", TypeError
     #   ujson:       "True", "False", "None", "<object object at …>"
     #   rapidjson:   TypeError (all)
+    #   orjson:      TypeError (all, unless OPT_NON_STR_KEYS is set)
+    #
+    # Keys are always converted to strings here, following the stdlib
+    # convention, so the output does not depend on the JSON backend.
 
     if obj is True:
         return 'true'
@@ -164,36 +299,709 @@ def _marshal_dict(obj, registry):
 
 
 def _marshal_enum(obj, registry):
-    return obj.value
+    # _value_ is a plain instance attribute, .value goes through a descriptor.
+    return obj._value_
+
+
+INFINITY = float('inf')
+
+
+def _encode_float(obj):
+    # Same as the stdlib encoder with the default allow_nan=True.
+    if obj != obj:
+        return 'NaN'
+    elif obj == INFINITY:
+        return 'Infinity'
+    elif obj == -INFINITY:
+        return '-Infinity'
+    return float.__repr__(obj)
+
+
+JSON_ENCODER = json.JSONEncoder()
+
+SCALAR_ENCODERS = {
+    str: encode_basestring_ascii,
+    int: int.__repr__,
+    float: _encode_float,
+    bool: lambda obj: 'true' if obj else 'false',
+    NONE_TYPE: lambda obj: 'null',
+}
+
+
+def _iterencode(obj, registry):
+    """
+    Marshal *obj* and yield the result as JSON text in small pieces.
+
+    attrs classes, lists, tuples and dicts are walked directly, so their
+    JSON-compatible representation is never built. Everything else (hooks,
+    sets, enums) is marshalled as usual and the result is encoded with the
+    stdlib encoder. The output is the same as ``json.dumps(marshal(obj))``.
+    """
+    impl = registry._resolve_marshal_impl(obj.__class__)
+    # Profiled impls are only timed when called, not when walked here.
+    impl = getattr(impl, 'fieldmarshal_impl', impl)
+    if impl is IDENTITY:
+        encoder = SCALAR_ENCODERS.get(obj.__class__)
+        yield JSON_ENCODER.encode(obj) if encoder is None else encoder(obj)
+        return
+
+    fields = getattr(impl, 'attrs_fields', None)
+    if fields is not None:
+        memo = registry._json_memo
+        if memo is None or not _is_frozen(obj.__class__):
+            yield from _iterencode_struct(obj, impl, registry)
+            return
+        # Entries keep their instance alive, so its id can't be reused.
+        key = id(obj)
+        try:
+            _, text = memo[key]
+        except KeyError:
+            memo.misses += 1
+            text = ''.join(_iterencode_struct(obj, impl, registry))
+            memo[key] = (obj, text)
+        yield text
+    elif impl is _marshal_list:
+        separator = '['
+        for item in obj:
+            yield separator
+            separator = ', '
+            yield from _iterencode(item, registry)
+        yield '[]' if separator == '[' else ']'
+    elif impl is _marshal_dict:
+        separator = '{'
+        for key, value in obj.items():
+            yield separator
+            separator = ', '
+            yield encode_basestring_ascii(_marshal_dict_key(key, registry))
+            yield ': '
+            yield from _iterencode(value, registry)
+        yield '{}' if separator == '{' else '}'
+    else:
+        yield from JSON_ENCODER.iterencode(impl(obj, registry))
+
+
+def _iterencode_struct(obj, impl, registry):
+    fields = impl.attrs_fields
+    separator = '{'
+    if impl.attrs_tag is not None:
+        key, tag = impl.attrs_tag
+        yield '{%s: ' % encode_basestring_ascii(key)
+        yield from JSON_ENCODER.iterencode(tag)
+        separator = ', '
+    for name, attr_name, options in fields:
+        value = getattr(obj, attr_name)
+        if value is None and options.omit_if_none:
+            continue
+        yield separator
+        separator = ', '
+        yield encode_basestring_ascii(name)
+        yield ': '
+        if options.marshal is not None:
+            yield from JSON_ENCODER.iterencode(options.marshal(value))
+        elif options.set_order is not None and value.__class__ in {set, frozenset}:
+            marshal_set = _make_marshal_set(options.set_order)
+            yield from JSON_ENCODER.iterencode(marshal_set(value, registry))
+        else:
+            yield from _iterencode(value, registry)
+    yield '{}' if separator == '{' else '}'
+
+
+FROZEN_SETATTRS = getattr(attr._make, '_frozen_setattrs', None)
+
+
+def _is_frozen(cls):
+    """
+    Whether *cls* is an attrs class created with ``frozen=True``.
+    """
+    return FROZEN_SETATTRS is not None and cls.__setattr__ is FROZEN_SETATTRS
+
+
+def _make_memoized(impl, memo):
+    """
+    Wrap the marshal impl of a frozen attrs class so the result for each
+    instance is kept in *memo* and reused.
+    """
+    @wraps(impl)
+    def marshal_memoized(obj, registry):
+        # Entries keep their instance alive, so its id can't be reused.
+        key = id(obj)
+        try:
+            return memo[key][1]
+        except KeyError:
+            memo.misses += 1
+        data = impl(obj, registry)
+        memo[key] = (obj, data)
+        return data
+
+    marshal_memoized.fieldmarshal_impl = impl
+    return marshal_memoized
 
 
 def _unmarshal_default(obj, type_hint, registry):
     raise UnmarshalError("Can't unmarshal to %s: %r" % (type_hint, obj))
 
 
-def _unmarshal_attrs(obj, type_hint, registry):
-    kw = {}
-    for field in type_hint.__attrs_attrs__:
-        key = (type_hint, field.name)
+def _unmarshal_value_lines(i, type_hint, options, registry, namespace, indent):
+    """
+    Return source lines that convert the raw value in variable ``v<i>`` to
+    *type_hint* in place.
+    """
+    indent = ' ' * indent
+    if options.unmarshal is not None:
+        namespace['hook_%d' % i] = options.unmarshal
+        return ['%sv%d = hook_%d(v%d)' % (indent, i, i, i)]
+    if type_hint is Any:
+        return []
+
+    namespace['type_%d' % i] = type_hint
+
+    # Scalars (and Optional scalars) only need a type check, unless a hook
+    # is registered for them. Values of any other class (including
+    # subclasses) take the regular path, which also produces the error.
+    scalar = type_hint
+    optional = False
+    if getattr(type_hint, '__origin__', None) is Union:
+        args = type_hint.__args__
+        if len(args) == 2 and NONE_TYPE in args:
+            scalar, = [t for t in args if t is not NONE_TYPE]
+            optional = True
+    if scalar in SCALAR_TYPES and \
+            registry.lookup_unmarshal_impl(scalar, type_hint)[0] is IDENTITY:
+        namespace['scalar_%d' % i] = scalar
+        condition = 'v%d.__class__ is not scalar_%d' % (i, i)
+        if optional and scalar is not NONE_TYPE:
+            condition = 'v%d is not None and %s' % (i, condition)
+        return [
+            '%sif %s:' % (indent, condition),
+            '%s    v%d = unmarshal(v%d, type_%d)' % (indent, i, i, i),
+        ]
+
+    return ['%sv%d = unmarshal(v%d, type_%d)' % (indent, i, i, i)]
+
+
+def _compile_unmarshal_attrs(cls, registry):
+    """
+    Generate an unmarshal implementation specialized for the attrs class *cls*.
+
+    The generated function reads the known keys, converts the values, fills in
+    defaults for missing keys and calls the constructor with positional
+    arguments. Field options and per-field hooks are resolved once.
+    """
+    namespace = {
+        'cls': cls,
+        'unmarshal': registry.unmarshal,
+        'NOTHING': attr.NOTHING,
+        'UnmarshalError': UnmarshalError,
+    }
+    required = []       # (i, name) of keys that must be present
+    lines = []
+    args = []           # positional constructor arguments
+    kwargs = []         # keyword constructor arguments
+    keywords = False    # pass keyword arguments from here on
+    conditional = False # some keyword arguments are passed through **kw
+    uses_get = False
+
+    for i, field in enumerate(cls.__attrs_attrs__):
+        if not field.init:
+            continue
+        if getattr(field, 'kw_only', False):
+            keywords = True
+        options = registry._get_field_options(cls, field)
+        name = field.name if options.name is None else options.name
+        default = field.default
+        takes_self = isinstance(default, attr.Factory) and default.takes_self
+        if isinstance(default, attr.Factory):
+            namespace['factory_%d' % i] = default.factory
+            default_expr = 'factory_%d()' % i
+        else:
+            namespace['default_%d' % i] = default
+            default_expr = 'default_%d' % i
+        arg_name = getattr(field, 'alias', None) or field.name.lstrip('_')
+
+        if options.omit:
+            # Leave the field to the constructor, unless we know its default.
+            if default is attr.NOTHING or takes_self:
+                keywords = True
+                continue
+            value = default_expr
+        elif default is attr.NOTHING:
+            required.append((i, name))
+            lines.extend(_unmarshal_value_lines(
+                i, field.type or Any, options, registry, namespace, 4))
+            value = 'v%d' % i
+        elif takes_self:
+            uses_get = keywords = conditional = True
+            lines.append('    v%d = get(%r, NOTHING)' % (i, name))
+            lines.append('    if v%d is not NOTHING:' % i)
+            lines.extend(_unmarshal_value_lines(
+                i, field.type or Any, options, registry, namespace, 8))
+            lines.append('        kw[%r] = v%d' % (arg_name, i))
+            continue
+        else:
+            uses_get = True
+            lines.append('    v%d = get(%r, NOTHING)' % (i, name))
+            lines.append('    if v%d is NOTHING:' % i)
+            lines.append('        v%d = %s' % (i, default_expr))
+            lines.append('    else:')
+            lines.extend(_unmarshal_value_lines(
+                i, field.type or Any, options, registry, namespace, 8)
+                or ['        pass'])
+            value = 'v%d' % i
+
+        if keywords:
+            kwargs.append('%s=%s' % (arg_name, value))
+        else:
+            args.append(value)
+
+    header = ['def unmarshal_attrs(obj, type_hint, registry):']
+    if required:
+        header.append('    try:')
+        header.extend('        v%d = obj[%r]' % (i, name) for i, name in required)
+        header.append('    except KeyError as e:')
+        header.append('        raise UnmarshalError('
+                      "'missing key: %r' % e.args[0]) from e")
+    if uses_get:
+        header.append('    get = obj.get')
+    if conditional:
+        header.append('    kw = {}')
+        kwargs.append('**kw')
+
+    lines = header + lines
+    lines.append('    return cls(%s)' % ', '.join(args + kwargs))
+    filename = '<fieldmarshal unmarshal %s.%s>' % (cls.__module__, cls.__qualname__)
+    fn = _compile('unmarshal_attrs', lines, namespace, filename)
+    fn.attrs_class = cls
+    return fn
+
+
+LAZY_ORIGINS = {list, tuple, set, frozenset, dict, List, Tuple, Set, FrozenSet, Dict}
+
+
+def _is_lazy_type(type_hint):
+    """
+    Whether fields of type *type_hint* are decoded on first access in lazy
+    mode: attrs classes, containers and unions containing either.
+    """
+    if getattr(type_hint, '__mro__', None) is not None:
+        return attr.has(type_hint)
+    origin = getattr(type_hint, '__origin__', None)
+    if origin is Union:
+        return any(_is_lazy_type(t) for t in type_hint.__args__)
+    return origin in LAZY_ORIGINS
+
+
+class _LazyField:
+    """
+    Descriptor for a field of a lazy struct that is unmarshalled on first
+    access from the data saved on the instance.
+    """
+    __slots__ = ('name', 'key', 'type_hint', 'slot', 'registry')
+
+    def __init__(self, name, key, type_hint, slot, registry):
+        self.name = name
+        self.key = key
+        self.type_hint = type_hint
+        self.slot = slot
+        self.registry = registry
+
+    def __get__(self, inst, owner=None):
+        if inst is None:
+            return self
+        if self.slot is not None:
+            try:
+                return self.slot.__get__(inst, owner)
+            except AttributeError:
+                pass
+        else:
+            try:
+                return inst.__dict__[self.name]
+            except KeyError:
+                pass
+        data = inst._fieldmarshal_data
+        value = self.registry.unmarshal(data[self.key], self.type_hint, lazy=True)
+        self.__set__(inst, value)
+        return value
+
+    def __set__(self, inst, value):
+        if self.slot is not None:
+            self.slot.__set__(inst, value)
+        else:
+            inst.__dict__[self.name] = value
+
+
+def _make_lazy_unmarshal(cls, registry):
+    """
+    Return a function that creates a lazily unmarshalled instance of the attrs
+    class *cls* from a dict.
+
+    The instance is of a generated subclass of *cls* in which nested structs
+    and containers are unmarshalled when the field is first read. All other
+    fields are unmarshalled right away. The instance is created without
+    calling ``__init__``, so validators and converters do not run.
+    """
+    eager = []
+    namespace = {
+        '__slots__': ('_fieldmarshal_data',),
+        '__module__': cls.__module__,
+        '__qualname__': cls.__qualname__,
+        '__hash__': cls.__hash__,
+    }
+    for field in cls.__attrs_attrs__:
+        options = registry._get_field_options(cls, field)
+        name = field.name if options.name is None else options.name
+        type_hint = field.type or Any
+        if options.omit or not field.init:
+            eager.append((field.name, None, type_hint, None, field.default))
+        elif options.unmarshal is None and _is_lazy_type(type_hint):
+            slot = getattr(cls, field.name, None)
+            if not isinstance(slot, MemberDescriptorType):
+                slot = None
+            namespace[field.name] = _LazyField(
+                field.name, name, type_hint, slot, registry)
+            eager.append((field.name, name, None, None, field.default))
+        else:
+            eager.append((field.name, name, type_hint, options.unmarshal, field.default))
+
+    attr_names = [field.name for field in cls.__attrs_attrs__ if field.eq]
+
+    def __eq__(self, other):
+        if not isinstance(other, cls) or \
+                other.__class__ not in {cls, self.__class__}:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name)
+                   for name in attr_names)
+
+    def __ne__(self, other):
+        result = __eq__(self, other)
+        return result if result is NotImplemented else not result
+
+    if cls.__eq__ is not object.__eq__:
+        namespace['__eq__'] = __eq__
+        namespace['__ne__'] = __ne__
+
+    all_names = [field.name for field in cls.__attrs_attrs__]
+
+    def __reduce__(self):
+        # The generated class can't be pickled by name, so all fields are
+        # unmarshalled and a plain instance of cls is pickled instead.
+        state = {}
+        for name in all_names:
+            try:
+                state[name] = getattr(self, name)
+            except AttributeError:
+                pass
+        return _unpickle_lazy, (cls, state)
+
+    namespace['__reduce__'] = __reduce__
+
+    lazy_cls = type(cls.__name__, (cls,), namespace)
+    unmarshal = registry.unmarshal
+    setattr_ = object.__setattr__
+
+    def unmarshal_lazy(obj):
+        inst = object.__new__(lazy_cls)
+        setattr_(inst, '_fieldmarshal_data', obj)
+        for attr_name, key, type_hint, hook, default in eager:
+            if key is not None and key in obj:
+                if hook is not None:
+                    setattr_(inst, attr_name, hook(obj[key]))
+                elif type_hint is not None:
+                    setattr_(inst, attr_name, unmarshal(obj[key], type_hint))
+            elif default is not attr.NOTHING:
+                setattr_(inst, attr_name, _get_default(default, inst))
+            elif key is not None:
+                raise UnmarshalError('missing key: %r' % key)
+        return inst
+
+    return unmarshal_lazy
+
+
+def _unpickle_lazy(cls, state):
+    inst = object.__new__(cls)
+    for name, value in state.items():
+        object.__setattr__(inst, name, value)
+    return inst
+
+
+def _get_default(default, inst):
+    if isinstance(default, attr.Factory):
+        return default.factory(inst) if default.takes_self else default.factory()
+    return default
+
+
+def _projection_tree(paths):
+    """
+    Convert dotted field paths to a tree of nested dicts. ``None`` selects
+    the complete subtree.
+    """
+    tree = {}
+    for path in paths:
+        node = tree
+        names = path.split('.')
+        for name in names[:-1]:
+            node = node.setdefault(name, {})
+            if node is None:
+                break
+        else:
+            node[names[-1]] = None
+    return tree
+
+
+def _make_projection(type_hint, tree, registry):
+    """
+    Return a function that unmarshals data to *type_hint*, but only converts
+    the fields selected by the projection *tree*.
+    """
+    if tree is None:
+        return lambda obj: registry.unmarshal(obj, type_hint)
+    plans = {}
+
+    def project(obj):
+        impl, type_ = registry._resolve_unmarshal_impl(obj.__class__, type_hint)
+        if impl is IDENTITY:
+            return obj
         try:
-            options = registry._field_options_cache[key]
+            plan = plans[type_]
         except KeyError:
-            options = field.metadata.get('fieldmarshal', DEFAULT_OPTIONS)
-            registry._field_options_cache[key] = options
-        if not options.omit:
-            name = field.name if options.name is None else options.name
-            try:
-                value = obj[name]
-            except KeyError as e:
-                if field.default is not attr.NOTHING:
-                    value = field.default
-                else:
-                    raise UnmarshalError('missing key: %r' % name) from e
-            if options.unmarshal is not None:
-                kw[field.name] = options.unmarshal(value)
+            plan = plans[type_] = _make_resolved_projection(impl, type_, tree, registry)
+        return plan(obj)
+
+    return project
+
+
+def _unknown_projection_paths(type_hint, tree, registry):
+    """
+    Return the dotted paths of the projection *tree* that don't select a
+    field of *type_hint*. Paths continue through containers and unions like
+    the projection itself; a path into a member of a union is known if any
+    member has it.
+    """
+    if tree is None:
+        return set()
+    if isinstance(type_hint, type) and attr.has(type_hint):
+        fields = {field.name: field for field in type_hint.__attrs_attrs__}
+        unknown = set()
+        for name, subtree in tree.items():
+            field = fields.get(name)
+            if field is None:
+                unknown.update(_tree_paths({name: subtree}))
+            elif registry._get_field_options(type_hint, field).unmarshal is not None:
+                # Field hooks always get the complete value.
+                unknown.update('%s.%s' % (name, path) for path in _tree_paths(subtree))
             else:
-                kw[field.name] = registry.unmarshal(value, field.type or Any)
-    return type_hint(**kw)
+                unknown.update('%s.%s' % (name, path) for path in _unknown_projection_paths(
+                    field.type or Any, subtree, registry))
+        return unknown
+
+    origin = getattr(type_hint, '__origin__', None)
+    if PY36:
+        origin = {List: list, Tuple: tuple, Set: set, FrozenSet: frozenset,
+                  Dict: dict}.get(origin, origin)
+    args = getattr(type_hint, '__args__', None) or ()
+    if origin is Union:
+        return set.intersection(*[_unknown_projection_paths(t, tree, registry)
+                                  for t in args if t is not NONE_TYPE])
+    elif origin in {list, set, frozenset} or \
+            origin is tuple and len(args) == 2 and args[1] is Ellipsis:
+        return _unknown_projection_paths(args[0], tree, registry)
+    elif origin is dict:
+        return _unknown_projection_paths(args[1], tree, registry)
+    # Other types are unmarshalled as a whole.
+    return set(_tree_paths(tree))
+
+
+def _tree_paths(tree):
+    """
+    Yield the dotted paths of the leaves of a projection tree.
+    """
+    for name, subtree in (tree or {}).items():
+        if subtree is None:
+            yield name
+        else:
+            for path in _tree_paths(subtree):
+                yield '%s.%s' % (name, path)
+
+
+def _make_resolved_projection(impl, type_hint, tree, registry):
+    cls = getattr(impl, 'attrs_class', None)
+    if cls is not None:
+        return _make_struct_projection(cls, tree, registry)
+
+    origin = getattr(type_hint, '__origin__', None)
+    if PY36:
+        origin = {List: list, Tuple: tuple, Set: set, FrozenSet: frozenset,
+                  Dict: dict}.get(origin, origin)
+    args = getattr(type_hint, '__args__', None) or ()
+    if origin in {list, set, frozenset} or \
+            origin is tuple and len(args) == 2 and args[1] is Ellipsis:
+        item = _make_projection(args[0], tree, registry)
+        if origin is list:
+            return lambda obj: [item(value) for value in obj]
+        return lambda obj: origin(map(item, obj))
+    elif origin is dict:
+        key_type, value_type = args
+        value = _make_projection(value_type, tree, registry)
+        key = _make_dict_key_converter(key_type, registry) or IDENTITY
+        return lambda obj: {k if key is IDENTITY else key(k): value(v)
+                            for k, v in obj.items()}
+
+    return lambda obj: impl(obj, type_hint, registry)
+
+
+def _make_struct_projection(cls, tree, registry):
+    specs = []
+    for field in cls.__attrs_attrs__:
+        options = registry._get_field_options(cls, field)
+        if options.omit or field.name not in tree:
+            specs.append((field.name, None, None, field.default))
+            continue
+        name = field.name if options.name is None else options.name
+        if options.unmarshal is not None:
+            convert = options.unmarshal
+        else:
+            convert = _make_projection(field.type or Any, tree[field.name], registry)
+        specs.append((field.name, name, convert, field.default))
+
+    setattr_ = object.__setattr__
+
+    def project_struct(obj):
+        inst = object.__new__(cls)
+        for attr_name, key, convert, default in specs:
+            if key is not None and key in obj:
+                setattr_(inst, attr_name, convert(obj[key]))
+            elif default is not attr.NOTHING:
+                setattr_(inst, attr_name, _get_default(default, inst))
+            elif key is not None:
+                raise UnmarshalError('missing key: %r' % key)
+        return inst
+
+    return project_struct
+
+
+def _make_trusted(type_hint, registry):
+    """
+    Return a function that converts trusted data to *type_hint* without
+    validating it, or ``None`` if the data can be used as-is.
+
+    Scalars are not checked, attrs classes are created without calling
+    ``__init__`` and containers are converted directly. Types with hooks,
+    enums and unions other than ``Optional[…]`` take the regular path.
+    """
+    if type_hint is Any:
+        return None
+    if type_hint in registry._unmarshal_hook_impl:
+        return lambda obj: registry.unmarshal(obj, type_hint)
+
+    if getattr(type_hint, '__mro__', None) is not None:
+        if type_hint in SCALAR_TYPES and \
+                registry.lookup_unmarshal_impl(type_hint, type_hint)[0] is IDENTITY:
+            return None
+        if attr.has(type_hint) and not registry._hook_exists_for(dict, type_hint):
+            # Nested structs go through the cache, which also handles
+            # recursive classes.
+            return lambda obj: registry._unmarshal_trusted(obj, type_hint)
+        return lambda obj: registry.unmarshal(obj, type_hint)
+
+    origin = getattr(type_hint, '__origin__', None)
+    if PY36:
+        origin = {List: list, Tuple: tuple, Set: set, FrozenSet: frozenset,
+                  Dict: dict}.get(origin, origin)
+    args = getattr(type_hint, '__args__', None) or ()
+    if origin is Union and len(args) == 2 and NONE_TYPE in args:
+        value_type, = [t for t in args if t is not NONE_TYPE]
+        value = _make_trusted(value_type, registry)
+        if value is None:
+            return None
+        return lambda obj: None if obj is None else value(obj)
+    elif origin in {list, set, frozenset} or \
+            origin is tuple and len(args) == 2 and args[1] is Ellipsis:
+        item = _make_trusted(args[0], registry)
+        if item is None:
+            return origin
+        if origin is list:
+            return lambda obj: [item(value) for value in obj]
+        return lambda obj: origin(map(item, obj))
+    elif origin is tuple and args:
+        items = [_make_trusted(t, registry) or IDENTITY for t in args]
+        return lambda obj: tuple(value if item is IDENTITY else item(value)
+                                 for item, value in zip(items, obj))
+    elif origin is dict:
+        key_type, value_type = args
+        key = _make_dict_key_converter(key_type, registry)
+        value = _make_trusted(value_type, registry)
+        if key is None:
+            if value is None:
+                return dict
+            return lambda obj: {k: value(v) for k, v in obj.items()}
+        if value is None:
+            return lambda obj: dict(zip(map(key, obj), obj.values()))
+        return lambda obj: {key(k): value(v) for k, v in obj.items()}
+
+    return lambda obj: registry.unmarshal(obj, type_hint)
+
+
+def _compile_trusted_unmarshal_attrs(cls, registry):
+    """
+    Generate a function that creates an instance of the attrs class *cls*
+    from trusted data.
+
+    The instance is created with ``object.__new__`` and the values are
+    assigned to the slots (or attributes) directly, so ``__init__``,
+    validators and converters are skipped. Missing keys still use the
+    field defaults.
+    """
+    namespace = {
+        'new': object.__new__,
+        'cls': cls,
+        'setattr_': object.__setattr__,
+        'NOTHING': attr.NOTHING,
+        'UnmarshalError': UnmarshalError,
+    }
+    lines = ['def unmarshal_trusted(obj):', '    inst = new(cls)', '    get = obj.get']
+    for i, field in enumerate(cls.__attrs_attrs__):
+        options = registry._get_field_options(cls, field)
+        slot = getattr(cls, field.name, None)
+        if isinstance(slot, MemberDescriptorType):
+            namespace['set_%d' % i] = slot.__set__
+            assign = 'set_%d(inst, %%s)' % i
+        else:
+            assign = 'setattr_(inst, %r, %%s)' % field.name
+
+        default = field.default
+        if isinstance(default, attr.Factory):
+            namespace['factory_%d' % i] = default.factory
+            default_expr = 'factory_%d(%s)' % (i, 'inst' if default.takes_self else '')
+        else:
+            namespace['default_%d' % i] = default
+            default_expr = 'default_%d' % i
+
+        if options.omit or not field.init:
+            if default is not attr.NOTHING:
+                lines.append('    ' + assign % default_expr)
+            continue
+
+        name = field.name if options.name is None else options.name
+        if options.unmarshal is not None:
+            namespace['convert_%d' % i] = options.unmarshal
+            value = 'convert_%d(v)' % i
+        else:
+            convert = _make_trusted(field.type or Any, registry)
+            namespace['convert_%d' % i] = convert
+            value = 'v' if convert is None else 'convert_%d(v)' % i
+
+        lines.append('    v = get(%r, NOTHING)' % name)
+        lines.append('    if v is not NOTHING:')
+        lines.append('        ' + assign % value)
+        if default is attr.NOTHING:
+            lines.append('    else:')
+            lines.append("        raise UnmarshalError('missing key: %%r' %% %r)" % name)
+        else:
+            lines.append('    else:')
+            lines.append('        ' + assign % default_expr)
+
+    lines.append('    return inst')
+    filename = '<fieldmarshal unmarshal trusted %s.%s>' % (cls.__module__, cls.__qualname__)
+    return _compile('unmarshal_trusted', lines, namespace, filename)
 
 
 def _unmarshal_dict_key(key, type_, registry):
@@ -221,6 +1029,64 @@ def _unmarshal_dict_key(key, type_, registry):
     return registry.unmarshal(obj, type_)
 
 
+def _make_dict_key_converter(type_, registry):
+    """
+    Return a function that converts a JSON object key to *type_*, or
+    ``None`` if keys can be used as-is.
+
+    This does the same as :func:`_unmarshal_dict_key`, but the checks on
+    *type_* are done once. Enum keys are looked up in a table of the
+    members' values.
+    """
+    def generic(key):
+        return _unmarshal_dict_key(key, type_, registry)
+
+    if getattr(type_, '__mro__', None) is None:
+        return generic
+
+    if type_ in SCALAR_TYPES:
+        if registry.lookup_unmarshal_impl(type_, type_)[0] is not IDENTITY:
+            return generic
+        if type_ is str:
+            return None
+        elif type_ in {int, float}:
+            return type_
+        table = {'true': True, 'false': False} if type_ is bool else {'null': None}
+
+        def convert_constant(key):
+            try:
+                return table[key]
+            except KeyError:
+                raise UnmarshalError(
+                    'Error converting dict key to %s. Expected %s, got %r'
+                    % (type_.__name__, ' or '.join(map(repr, table)), key)
+                ) from None
+
+        return convert_constant
+
+    if issubclass(type_, Enum):
+        int_keys = issubclass(type_, (Flag, IntEnum, IntFlag))
+        if registry._hook_exists_for(int if int_keys else str, type_):
+            return generic
+        # Includes aliases. Values that are not in the table (such as
+        # combinations of flags) take the regular path, which also raises
+        # the error for invalid keys.
+        if int_keys:
+            table = {str(value): member for value, member in type_._value2member_map_.items()}
+        else:
+            table = dict(type_._value2member_map_)
+
+        def convert_enum(key):
+            try:
+                return table[key]
+            except KeyError:
+                return generic(key)
+
+        return convert_enum
+
+    return generic
+
+
 # Lookup functions are called with the type of object being unmarshalled (cls),
 # the type to unmarshal to (type_hint) and the registry as arguments.
 # The job of the lookup function is to *validate* cls, which is a JSON-
@@ -253,9 +1119,48 @@ def _unmarshal_lookup_scalar(cls, type_hint, registry):
     return IDENTITY
 
 
-def _unmarshal_list(obj, type_hint, registry):
+def _unmarshal_items_plan(item_type, registry):
+    """
+    Return a function that unmarshals all items of a JSON array (or the values
+    of a JSON object) to *item_type* and returns them as a list.
+
+    The impl for each item class is resolved once per plan. When all items
+    have the same class, which is the common case, the items are converted in
+    a single comprehension, or just copied if no conversion is necessary.
+    """
+    impls = {}
+
+    def resolve(cls):
+        try:
+            return impls[cls]
+        except KeyError:
+            impls[cls] = registry._resolve_unmarshal_impl(cls, item_type)
+            return impls[cls]
+
+    def unmarshal_items(obj):
+        classes = set(map(type, obj))
+        if len(classes) == 1:
+            impl, type_ = resolve(classes.pop())
+            if impl is IDENTITY:
+                return list(obj)
+            return [impl(item, type_, registry) for item in obj]
+
+        for cls in classes:
+            resolve(cls)
+        result = []
+        append = result.append
+        for item in obj:
+            impl, type_ = impls[item.__class__]
+            append(item if impl is IDENTITY else impl(item, type_, registry))
+        return result
+
+    return unmarshal_items
+
+
+def _unmarshal_list_plan(type_hint, registry):
     item_type, = type_hint.__args__
-    return [registry.unmarshal(item, item_type) for item in obj]
+    items = _unmarshal_items_plan(item_type, registry)
+    return lambda obj, _, __: items(obj)
 
 
 def _unmarshal_tuple_fixed_length(obj, type_hint, registry):
@@ -269,12 +1174,13 @@ def _unmarshal_tuple_fixed_length(obj, type_hint, registry):
         for item, type_ in zip(obj, item_types)])
 
 
-def _unmarshal_tuple_variable_length(obj, type_hint, registry):
+def _unmarshal_tuple_variable_length_plan(type_hint, registry):
     item_type, _ = type_hint.__args__
-    return tuple([registry.unmarshal(item, item_type) for item in obj])
+    items = _unmarshal_items_plan(item_type, registry)
+    return lambda obj, _, __: tuple(items(obj))
 
 
-def _unmarshal_set_frozenset(obj, type_hint, registry):
+def _unmarshal_set_frozenset_plan(type_hint, registry):
     type_ = type_hint.__origin__
     if PY36:
         if type_ is Set:
@@ -282,14 +1188,21 @@ def _unmarshal_set_frozenset(obj, type_hint, registry):
         elif type_ is FrozenSet:
             type_ = frozenset
     item_type, = type_hint.__args__
-    return type_([registry.unmarshal(item, item_type) for item in obj])
+    items = _unmarshal_items_plan(item_type, registry)
+    return lambda obj, _, __: type_(items(obj))
 
 
-def _unmarshal_dict(obj, type_hint, registry):
+def _unmarshal_dict_plan(type_hint, registry):
     key_type, value_type = type_hint.__args__
-    return {_unmarshal_dict_key(k, key_type, registry):
-                registry.unmarshal(v, value_type)
-            for k, v in obj.items()}
+    values = _unmarshal_items_plan(value_type, registry)
+
+    key = _make_dict_key_converter(key_type, registry)
+
+    def unmarshal_dict(obj, type_hint, registry):
+        keys = obj if key is None else map(key, obj)
+        return dict(zip(keys, values(obj.values())))
+
+    return unmarshal_dict
 
 
 # type_hint: any of (list, tuple, set, frozenset), or their typing equivalents
@@ -306,15 +1219,15 @@ def _unmarshal_lookup_list(cls, type_hint, registry):
         type_ = {List: list, Tuple: tuple, Set: set, FrozenSet: frozenset}[type_]
 
     if type_ is list:
-        return _unmarshal_list
+        return _unmarshal_list_plan(type_hint, registry)
     elif type_ is tuple:
         args = type_hint.__args__
         if len(args) == 2 and args[1] is Ellipsis:
-            return _unmarshal_tuple_variable_length
+            return _unmarshal_tuple_variable_length_plan(type_hint, registry)
         else:
             return _unmarshal_tuple_fixed_length
     elif type_ in {set, frozenset}:
-        return _unmarshal_set_frozenset
+        return _unmarshal_set_frozenset_plan(type_hint, registry)
 
     raise UnmarshalError("Can't unmarshal %s to %s" % (cls, type_hint))
 
@@ -325,17 +1238,40 @@ def _unmarshal_lookup_dict(cls, type_hint, registry):
     if type_hint is dict:
         return IDENTITY
     else:
-        return _unmarshal_dict
+        return _unmarshal_dict_plan(type_hint, registry)
+
+
+def _make_unmarshal_enum(type_hint):
+    """
+    Return an unmarshal impl for the enum class *type_hint* that looks
+    members up by value in a table, instead of calling the class.
+    """
+    # Includes aliases. Values that are not in the table (such as
+    # combinations of flags, or values handled by _missing_) fall back to
+    # calling the class.
+    table = dict(type_hint._value2member_map_)
+
+    def unmarshal_enum(obj, type_, registry):
+        try:
+            return table[obj]
+        except KeyError:
+            pass
+        try:
+            return type_(obj)
+        except ValueError:
+            raise UnmarshalError('Unknown value for %s: %r' % (type_.__name__, obj)) from None
+
+    return unmarshal_enum
 
 
 @require(*SCALAR_TYPES)
 def _unmarshal_lookup_enum(cls, type_hint, registry):
-    return lambda obj, type_, _: type_(obj)
+    return _make_unmarshal_enum(type_hint)
 
 
 @require(int)
 def _unmarshal_lookup_int_enum(cls, type_hint, registry):
-    return lambda obj, type_, _: type_(obj)
+    return _make_unmarshal_enum(type_hint)
 
 
 def _resolve_union(cls, type_hint, registry):
@@ -367,9 +1303,8 @@ def _resolve_union(cls, type_hint, registry):
     # scalar-types.
     if cls not in union_types and cls not in SCALAR_TYPES:
         union_types = tuple(t for t in union_types if t not in SCALAR_TYPES)
-        type_ = Union[union_types]
-        if type_ != type_hint:
-            return registry.lookup_unmarshal_impl(cls, type_)
+        if union_types and Union[union_types] != type_hint:
+            return registry.lookup_unmarshal_impl(cls, Union[union_types])
 
     # As a last resort, see if there is exactly one non-scalar type in the
     # Union, and try that (even if cls is a scalar type, because it could be
@@ -378,6 +1313,11 @@ def _resolve_union(cls, type_hint, registry):
     if len(candidates) == 1:
         return registry.lookup_unmarshal_impl(cls, candidates[0])
 
+    # Optionally, pick one of several attrs classes by the keys of the data.
+    if registry.resolve_unions_by_shape and issubclass(cls, Mapping) and \
+            candidates and all(attr.has(t) for t in candidates):
+        return _make_shape_resolver(candidates, registry), type_hint
+
     raise UnmarshalError(
         "Can't resolve unmarshal implementation for %s to %s. "
         "To resolve this, add an unmarshal hook for %s to the registry."
@@ -385,6 +1325,64 @@ def _resolve_union(cls, type_hint, registry):
     )
 
 
+# Maximum number of key sets remembered per union by shape resolvers
+MAX_UNION_SHAPES = 1024
+
+
+def _make_shape_resolver(classes, registry):
+    """
+    Return an unmarshal impl that picks one of the attrs *classes* based on
+    the keys present in the data.
+
+    A class matches if all of its required keys are present. Among the
+    matching classes, the one that knows the most of the keys wins, with
+    ties broken in favour of the class with fewer unused (optional) keys.
+    The result is cached per set of keys.
+    """
+    shapes = []
+    for cls in classes:
+        required = set()
+        known = set()
+        for field in cls.__attrs_attrs__:
+            options = registry._get_field_options(cls, field)
+            if options.omit or not field.init:
+                continue
+            name = field.name if options.name is None else options.name
+            known.add(name)
+            if field.default is attr.NOTHING:
+                required.add(name)
+        shapes.append((cls, frozenset(required), frozenset(known)))
+
+    resolved = {}
+
+    def resolve(keys, type_hint):
+        matches = [((len(known & keys), -len(known - keys)), cls)
+                   for cls, required, known in shapes if required <= keys]
+        if not matches:
+            raise UnmarshalError(
+                "Can't unmarshal to %s: no member matches the keys %s"
+                % (type_hint, sorted(keys)))
+        best = max(score for score, _ in matches)
+        winners = [cls for score, cls in matches if score == best]
+        if len(winners) > 1:
+            raise UnmarshalError(
+                "Can't unmarshal to %s: the keys %s match %s"
+                % (type_hint, sorted(keys), ', '.join(map(str, winners))))
+        return winners[0]
+
+    def unmarshal_by_shape(obj, type_hint, registry):
+        keys = frozenset(obj)
+        try:
+            cls = resolved[keys]
+        except KeyError:
+            cls = resolve(keys, type_hint)
+            if len(resolved) < MAX_UNION_SHAPES:
+                resolved[keys] = cls
+        return registry.unmarshal(obj, cls)
+
+    return unmarshal_by_shape
+
+
 @struct
 class Hook:
     """
@@ -401,32 +1399,748 @@ class Hook:
     takes_args: bool = True
 
 
+@struct
+class JsonBackend:
+    """
+    JSON encoder/decoder used by :meth:`Registry.marshal_json` and
+    :meth:`Registry.unmarshal_json`.
+
+    :param str name: Name of the backend
+    :param callable dumps: Function to convert a JSON-compatible data structure
+        to JSON. Can return either ``str`` or ``bytes``.
+    :param callable loads: Function to parse JSON. Must accept ``str`` and
+        should accept ``bytes``.
+    :param bool buffers: Whether *loads* can parse UTF-8 encoded JSON from
+        ``bytearray`` and ``memoryview`` objects without copying. If not, such
+        data is decoded to ``str`` first.
+
+    Use :func:`get_json_backend` to get a backend for one of the supported JSON
+    libraries.
+    """
+    name: str
+    dumps: Any
+    loads: Any
+    buffers: bool = False
+
+
+def _json_backend_json():
+    return JsonBackend('json', json.dumps, json.loads)
+
+
+def _json_backend_orjson():
+    import orjson
+    return JsonBackend('orjson', orjson.dumps, orjson.loads, buffers=True)
+
+
+def _json_backend_ujson():
+    import ujson
+    # Don't escape "/" as "\/", to match the other backends.
+    dumps = lambda obj: ujson.dumps(obj, escape_forward_slashes=False)
+    return JsonBackend('ujson', dumps, ujson.loads)
+
+
+def _json_backend_rapidjson():
+    import rapidjson
+    return JsonBackend('rapidjson', rapidjson.dumps, rapidjson.loads)
+
+
+JSON_BACKENDS = {
+    'json': _json_backend_json,
+    'orjson': _json_backend_orjson,
+    'ujson': _json_backend_ujson,
+    'rapidjson': _json_backend_rapidjson,
+}
+
+
+def get_json_backend(name='auto'):
+    """
+    Return a :class:`JsonBackend` for one of the supported JSON libraries.
+
+    *name* is one of "json" (the standard library), "orjson", "ujson",
+    "rapidjson" or "auto". "auto" selects the first library out of orjson,
+    rapidjson, ujson that is installed, falling back to the standard library.
+
+    Raises ``ImportError`` if the requested library is not installed.
+
+    Note that the formatting of the output differs between backends. For
+    example, orjson returns compact ``bytes`` and the standard library returns
+    a ``str`` with spaces after separators.
+    """
+    if name == 'auto':
+        for name in ('orjson', 'rapidjson', 'ujson'):
+            try:
+                return JSON_BACKENDS[name]()
+            except ImportError:
+                pass
+        return _json_backend_json()
+    try:
+        factory = JSON_BACKENDS[name]
+    except KeyError:
+        raise ValueError('Unknown JSON backend: %r' % (name,)) from None
+    return factory()
+
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+NUMBER_TAIL = re.compile(r'(?:\.|[eE][-+]?)\Z')
+
+
+class _JsonStreamDecoder:
+    """
+    Split a stream of JSON text into top-level values, one chunk at a time.
+
+    The stream is either a single JSON array, whose elements are returned one
+    by one, or JSON Lines (one JSON value per line). With *format* "auto", a
+    stream starting with "[" is treated as an array. Only the current,
+    incomplete value is kept in memory between calls to :meth:`feed`.
+    Chunks are either ``str`` or UTF-8 encoded ``bytes``.
+    """
+
+    def __init__(self, loads, format='auto'):
+        if format not in {'auto', 'array', 'lines'}:
+            raise ValueError('Unknown stream format: %r' % (format,))
+        self._loads = loads
+        self._format = format
+        self._decoder = json.JSONDecoder()
+        # Pending text, joined only once a line or element can be complete,
+        # so feeding many chunks of a large value doesn't copy it each time.
+        self._chunks = []
+        self._size = 0
+        self._text_decoder = None
+        # Array states: "[" before the first element, "," before any other
+        # element, "]" after an element, "" after the end of the array.
+        self._state = None
+        # Don't try to decode the buffer again until it has at least this
+        # many characters, to avoid quadratic behaviour for large elements.
+        self._wait_for = 0
+
+    def feed(self, data):
+        """
+        Add *data* to the stream and return a list of all values completed
+        by it.
+        """
+        if isinstance(data, (bytes, bytearray)):
+            if self._text_decoder is None:
+                self._text_decoder = codecs.getincrementaldecoder('utf-8')()
+            data = self._text_decoder.decode(data)
+        if not data:
+            return []
+        if self._format == 'auto':
+            match = WHITESPACE.match(data)
+            if match.end() == len(data):
+                self._append(data)
+                return []
+            self._format = 'array' if data[match.end()] == '[' else 'lines'
+        if self._format == 'lines':
+            return self._feed_lines(data, False)
+        self._append(data)
+        if self._size < self._wait_for:
+            return []
+        return self._feed_array(False)
+
+    def close(self):
+        """
+        Signal the end of the stream and return any remaining values.
+
+        Raises ``ValueError`` if the stream ends in the middle of a value.
+        """
+        if self._text_decoder is not None:
+            self._append(self._text_decoder.decode(b'', True))
+        if self._format == 'lines':
+            return self._feed_lines('', True)
+        elif self._format == 'array':
+            values = self._feed_array(True)
+            if self._state != '':
+                raise ValueError('Unexpected end of JSON array')
+            return values
+        text = ''.join(self._chunks)
+        if text.strip():
+            raise ValueError('Unexpected data in JSON stream: %r' % text)
+        return []
+
+    def _append(self, data):
+        self._chunks.append(data)
+        self._size += len(data)
+
+    def _feed_lines(self, data, final):
+        # Only the new data is searched; the pending text has no newline.
+        end = len(data) if final else data.rfind('\n')
+        if end == -1:
+            self._append(data)
+            return []
+        self._chunks.append(data[:end])
+        text = ''.join(self._chunks)
+        rest = data[end + 1:]
+        self._chunks = [rest] if rest else []
+        self._size = len(rest)
+        return [self._loads(line) for line in text.split('\n') if line.strip()]
+
+    def _feed_array(self, final):
+        values = []
+        buffer = ''.join(self._chunks)
+        pos = 0
+        wait_for = 0
+        state = self._state
+        while True:
+            pos = WHITESPACE.match(buffer, pos).end()
+            if pos == len(buffer):
+                break
+            char = buffer[pos]
+            if state is None:
+                if char != '[':
+                    raise ValueError('Expected JSON array, got %r' % char)
+                state = '['
+                pos += 1
+            elif state == '[' and char == ']' or state == ']' and char == ']':
+                state = ''
+                pos += 1
+            elif state == ']':
+                if char != ',':
+                    raise ValueError("Expected ',' or ']' in JSON array, got %r" % char)
+                state = ','
+                pos += 1
+            elif state:
+                try:
+                    value, end = self._decoder.raw_decode(buffer, pos)
+                except ValueError:
+                    if final:
+                        raise
+                    wait_for = 2 * (len(buffer) - pos)
+                    break
+                # A value at the end of the buffer might be incomplete: a
+                # number can continue, also after "1.", "1e" or "1e+".
+                if not final and (
+                        WHITESPACE.match(buffer, end).end() == len(buffer) or
+                        value.__class__ in {int, float} and
+                        NUMBER_TAIL.match(buffer, end)):
+                    wait_for = len(buffer) - pos + 1
+                    break
+                values.append(value)
+                state = ']'
+                pos = end
+            else:
+                raise ValueError('Extra data after JSON array: %r' % char)
+        rest = buffer[pos:]
+        self._chunks = [rest] if rest else []
+        self._size = len(rest)
+        self._state = state
+        self._wait_for = wait_for
+        return values
+
+
+PATCH_FORMATS = {'merge-patch', 'json-patch'}
+
+# Marker for a removed member in a patch tree.
+REMOVE = object()
+
+
+class _Value:
+    """
+    Leaf of a patch tree: replace the target with the JSON value *value*.
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+
+def _check_patch_format(format):
+    if format not in PATCH_FORMATS:
+        raise ValueError('Unknown patch format: %r' % (format,))
+
+
+def _marshal_field(value, options, registry):
+    """
+    Marshal the value of a struct field, taking the field options into
+    account.
+    """
+    if options.marshal is not None:
+        return options.marshal(value)
+    if options.set_order is not None and value.__class__ in {set, frozenset}:
+        return _make_marshal_set(options.set_order)(value, registry)
+    return registry.marshal(value)
+
+
+def _diff(old, new, path, ops, registry):
+    """
+    Append the changes from *old* to *new* to *ops* as (op, path, value)
+    tuples, where *path* is a list of object keys.
+
+    Objects of the same attrs class are compared field by field and dicts
+    key by key, so identical subobjects are skipped without marshalling
+    them. Everything else is compared after marshalling.
+    """
+    if old is new:
+        return
+    if old.__class__ is new.__class__:
+        impl = registry._resolve_marshal_impl(old.__class__)
+        impl = getattr(impl, 'fieldmarshal_impl', impl)
+        fields = getattr(impl, 'attrs_fields', None)
+        if fields is not None:
+            for name, attr_name, options in fields:
+                old_value = getattr(old, attr_name)
+                new_value = getattr(new, attr_name)
+                if old_value is new_value:
+                    continue
+                old_omitted = old_value is None and options.omit_if_none
+                new_omitted = new_value is None and options.omit_if_none
+                if old_omitted:
+                    ops.append(('add', path + [name], _marshal_field(new_value, options, registry)))
+                elif new_omitted:
+                    ops.append(('remove', path + [name], None))
+                elif options.marshal is not None or options.set_order is not None:
+                    _diff_json(_marshal_field(old_value, options, registry),
+                               _marshal_field(new_value, options, registry),
+                               path + [name], ops)
+                else:
+                    _diff(old_value, new_value, path + [name], ops, registry)
+            return
+        elif impl is _marshal_dict:
+            old_keys = {_marshal_dict_key(k, registry): k for k in old}
+            new_keys = {_marshal_dict_key(k, registry): k for k in new}
+            for key in old_keys:
+                if key not in new_keys:
+                    ops.append(('remove', path + [key], None))
+            for key, k in new_keys.items():
+                if key in old_keys:
+                    _diff(old[old_keys[key]], new[k], path + [key], ops, registry)
+                else:
+                    ops.append(('add', path + [key], registry.marshal(new[k])))
+            return
+        elif impl is IDENTITY:
+            if old != new:
+                ops.append(('replace', path, new))
+            return
+    _diff_json(registry.marshal(old), registry.marshal(new), path, ops)
+
+
+def _diff_json(old, new, path, ops):
+    if old.__class__ is dict and new.__class__ is dict:
+        for key in old:
+            if key not in new:
+                ops.append(('remove', path + [key], None))
+        for key, value in new.items():
+            if key in old:
+                _diff_json(old[key], value, path + [key], ops)
+            else:
+                ops.append(('add', path + [key], value))
+    elif old.__class__ is not new.__class__ or old != new:
+        ops.append(('replace', path, new))
+
+
+def _escape_pointer(key):
+    return key.replace('~', '~0').replace('/', '~1')
+
+
+def _unescape_pointer(token):
+    return token.replace('~1', '/').replace('~0', '~')
+
+
+def _ops_to_json_patch(ops):
+    patch = []
+    for op, path, value in ops:
+        item = {'op': op, 'path': ''.join('/' + _escape_pointer(key) for key in path)}
+        if op != 'remove':
+            item['value'] = value
+        patch.append(item)
+    return patch
+
+
+def _ops_to_merge_patch(ops):
+    if ops and not ops[0][1]:
+        return ops[0][2]
+    patch = {}
+    for op, path, value in ops:
+        node = patch
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+        node[path[-1]] = None if op == 'remove' else value
+    return patch
+
+
+def _merge_patch_tree(patch):
+    if patch.__class__ is not dict:
+        return _Value(patch)
+    return {key: REMOVE if value is None else _merge_patch_tree(value)
+            for key, value in patch.items()}
+
+
+def _json_patch_tree(patch):
+    """
+    Convert a JSON Patch to a patch tree. Only "add", "replace" and "remove"
+    operations on object members are supported.
+    """
+    root = {}
+    for item in patch:
+        op = item.get('op')
+        if op not in {'add', 'replace', 'remove'}:
+            raise ValueError('Unsupported JSON Patch operation: %r' % (op,))
+        pointer = item['path']
+        if pointer == '':
+            if op == 'remove':
+                raise ValueError("Can't remove the root of the document")
+            root = _Value(item['value'])
+            continue
+        if not pointer.startswith('/') or root.__class__ is not dict:
+            raise ValueError('Unsupported JSON Patch path: %r' % (pointer,))
+        keys = [_unescape_pointer(token) for token in pointer[1:].split('/')]
+        node = root
+        for key in keys[:-1]:
+            node = node.setdefault(key, {})
+            if node.__class__ is not dict:
+                raise ValueError('Unsupported JSON Patch path: %r' % (pointer,))
+        node[keys[-1]] = REMOVE if op == 'remove' else _Value(item['value'])
+    return root
+
+
+def _apply_tree_json(data, tree):
+    """
+    Apply a patch tree to JSON-compatible *data* and return the result.
+    *data* is not modified.
+    """
+    if tree.__class__ is _Value:
+        return tree.value
+    result = dict(data) if data.__class__ is dict else {}
+    for key, node in tree.items():
+        if node is REMOVE:
+            result.pop(key, None)
+        else:
+            result[key] = _apply_tree_json(result.get(key), node)
+    return result
+
+
+def _apply_tree(obj, tree, type_hint, registry):
+    """
+    Apply a patch tree to *obj* and return the result as a new object of
+    type *type_hint*. Only the changed parts are unmarshalled; unchanged
+    fields and dict values are shared with *obj*.
+    """
+    if tree.__class__ is _Value:
+        return registry.unmarshal(tree.value, type_hint)
+
+    impl = registry._resolve_marshal_impl(obj.__class__)
+    impl = getattr(impl, 'fieldmarshal_impl', impl)
+    fields = getattr(impl, 'attrs_fields', None)
+    if fields is not None:
+        by_name = {name: (attr_name, options) for name, attr_name, options in fields}
+        attributes = {a.name: a for a in obj.__class__.__attrs_attrs__}
+        changes = {}
+        for key, node in tree.items():
+            if key not in by_name:
+                continue
+            attr_name, options = by_name[key]
+            field = attributes[attr_name]
+            if node is REMOVE:
+                if field.default is attr.NOTHING:
+                    raise UnmarshalError('missing key: %r' % key)
+                value = _get_default(field.default, obj)
+            elif options.unmarshal is not None:
+                data = _apply_tree_json(
+                    _marshal_field(getattr(obj, attr_name), options, registry), node)
+                value = options.unmarshal(data)
+            elif options.marshal is not None or options.set_order is not None:
+                data = _apply_tree_json(
+                    _marshal_field(getattr(obj, attr_name), options, registry), node)
+                value = registry.unmarshal(data, field.type or Any)
+            else:
+                value = _apply_tree(getattr(obj, attr_name), node, field.type or Any, registry)
+            changes[getattr(field, 'alias', None) or field.name.lstrip('_')] = value
+        return attr.evolve(obj, **changes) if changes else obj
+
+    origin = getattr(type_hint, '__origin__', None)
+    if PY36:
+        origin = {Dict: dict}.get(origin, origin)
+    if impl is _marshal_dict and origin is dict:
+        key_type, value_type = type_hint.__args__
+        keys = {_marshal_dict_key(k, registry): k for k in obj}
+        convert = _make_dict_key_converter(key_type, registry)
+        result = dict(obj)
+        for key, node in tree.items():
+            if key in keys:
+                k = keys[key]
+                if node is REMOVE:
+                    del result[k]
+                else:
+                    result[k] = _apply_tree(obj[k], node, value_type, registry)
+            elif node is not REMOVE:
+                k = key if convert is None else convert(key)
+                result[k] = registry.unmarshal(_apply_tree_json(None, node), value_type)
+        return result
+
+    return registry.unmarshal(_apply_tree_json(registry.marshal(obj), tree), type_hint)
+
+
+@struct
+class ProfileEntry:
+    """
+    Profiling statistics for one marshal or unmarshal implementation, as
+    returned by :meth:`Registry.profile_snapshot`.
+
+    :param str operation: ``"marshal"`` or ``"unmarshal"``.
+    :param type_: The class being marshalled, or the (resolved) type being
+        unmarshalled to.
+    :param bool hook: Whether the implementation is a user hook.
+    :param int calls: Number of calls.
+    :param int items: Total number of elements of the ``list``, ``tuple``,
+        ``set``, ``dict`` or ``str`` objects passed in.
+    :param float total_time: Cumulative time in seconds, including nested
+        calls.
+    :param float self_time: Time in seconds, excluding nested calls of
+        other profiled implementations.
+    :param str field: For field hooks (``field(marshal=…)`` and
+        ``field(unmarshal=…)``), the name of the attribute; *type_* is then
+        the attrs class. ``None`` otherwise.
+    """
+    operation: str
+    type_: Any
+    hook: bool
+    calls: int = 0
+    items: int = 0
+    total_time: float = 0.0
+    self_time: float = 0.0
+    field: Optional[str] = None
+
+
+SIZED_TYPES = frozenset({list, tuple, set, frozenset, dict, str})
+
+
+def _make_profiled(impl, entry, profile, lock):
+    """
+    Wrap *impl* so each call is counted and timed in *entry*.
+
+    *profile* is the thread-local state of the registry; its ``stack``
+    holds the time spent in nested calls for each active call, which is
+    subtracted to get the self time. *entry* is updated while holding
+    *lock*.
+    """
+    perf_counter = time.perf_counter
+
+    @wraps(impl)
+    def profiled(obj, *args):
+        try:
+            stack = profile.stack
+        except AttributeError:
+            stack = profile.stack = []
+        stack.append(0.0)
+        start = perf_counter()
+        try:
+            return impl(obj, *args)
+        finally:
+            elapsed = perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            items = len(obj) if obj.__class__ in SIZED_TYPES else 0
+            with lock:
+                entry.calls += 1
+                entry.items += items
+                entry.total_time += elapsed
+                entry.self_time += elapsed - nested
+
+    profiled.fieldmarshal_impl = impl
+    return profiled
+
+
+@struct
+class CacheInfo:
+    """
+    Statistics for one of the caches of a registry, as returned by
+    :meth:`Registry.cache_info`.
+
+    :param hits: Number of lookups that found an entry. Only counted for
+        bounded caches, ``None`` otherwise.
+    :param int misses: Number of lookups that had to create a new entry.
+    :param int evictions: Number of entries dropped because the cache was
+        full.
+    :param int size: Current number of entries.
+    :param maxsize: Maximum number of entries, or ``None`` if unbounded.
+    """
+    hits: Optional[int]
+    misses: int
+    evictions: int
+    size: int
+    maxsize: Optional[int]
+
+
+class _Cache(dict):
+    """
+    Unbounded cache. Lookups are plain dict lookups, so only misses (counted
+    by the caller) are tracked.
+    """
+    maxsize = None
+
+    def __init__(self):
+        super().__init__()
+        self.hits = None
+        self.misses = 0
+        self.evictions = 0
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.evictions, len(self), self.maxsize)
+
+
+class _Memo(_Cache):
+    """
+    Cache that holds at most *maxsize* entries and drops the oldest entry
+    when full. Unlike :class:`_LruCache`, lookups are plain dict lookups.
+    """
+
+    def __init__(self, maxsize):
+        super().__init__()
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            dict.__setitem__(self, key, value)
+            if len(self) > self.maxsize:
+                del self[next(iter(self))]
+                self.evictions += 1
+
+
+class _LruCache(OrderedDict):
+    """
+    Cache that holds at most *maxsize* entries and drops the least recently
+    used entry when full.
+    """
+    info = _Cache.info
+
+    def __init__(self, maxsize):
+        super().__init__()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key):
+        with self._lock:
+            value = OrderedDict.__getitem__(self, key)
+            self.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            OrderedDict.__setitem__(self, key, value)
+            if len(self) > self.maxsize:
+                self.popitem(last=False)
+                self.evictions += 1
+
+
+CACHE_NAMES = {
+    'marshal': '_marshal_impl_cache',
+    'unmarshal': '_unmarshal_impl_cache',
+    'field_options': '_field_options_cache',
+    'lazy': '_lazy_unmarshal_cache',
+    'projection': '_projection_cache',
+    'trusted': '_trusted_cache',
+}
+
+MEMO_NAMES = {
+    'memo': '_marshal_memo',
+    'json_memo': '_json_memo',
+}
+
+
 # TODO rename "lookup" -> "resolve"?
 
 
 class Registry:
-    def __init__(self):
+    def __init__(self, json_backend='json', resolve_unions_by_shape=False, cache_size=None,
+                 set_order='sorted', memo_size=None):
         """
         Create a registry instance.
 
         A registry is used for marshalling and unmarshalling objects, and
         for registering hooks for types that are not handled natively.
+
+        Registries can be shared between threads. Cached implementations are
+        read without locking. Resolving a new implementation and adding hooks
+        take a lock. Hooks added while other threads are marshalling apply
+        to calls that resolve their implementations afterwards.
+
+        :param json_backend: The JSON library used by :meth:`marshal_json`
+            and :meth:`unmarshal_json`. Either a name accepted by
+            :func:`get_json_backend` or a :class:`JsonBackend`
+            object. Defaults to the standard library.
+        :param bool resolve_unions_by_shape: Resolve unions of several attrs
+            classes by the keys present in the data, instead of requiring an
+            unmarshal hook. The member whose required keys are all present,
+            and that knows the most of the given keys, is chosen. Field
+            renames are taken into account. The resolution is cached per set
+            of keys.
+        :param int cache_size: Maximum number of entries in each of the
+            registry's caches, such as the resolved marshal and unmarshal
+            implementations. The least recently used entries are dropped
+            when a cache is full. Defaults to ``None`` (unbounded), which is
+            faster. Bounded caches keep memory use in check for applications
+            that create classes or type hints dynamically. See
+            :meth:`cache_info`.
+        :param set_order: How to order the items of sets and frozensets,
+            which are marshalled to JSON arrays. "sorted" (the default) sorts
+            the marshalled items, which gives a deterministic result but
+            fails for items that can't be compared. "iteration" keeps the
+            set's iteration order, which is the fastest. A callable is used
+            as the key function to sort the items before they are
+            marshalled. Can be overridden per field, see :class:`Options`.
+        :param int memo_size: Remember the result of marshalling up to this
+            many instances of frozen attrs classes (the oldest entries are
+            dropped first), and reuse it when the same instance (by
+            identity) is marshalled again. This speeds up object graphs in
+            which the same instances are referenced many times.
+            :meth:`iter_marshal_json` and :meth:`dump` remember the JSON
+            text instead. Memoized instances are kept alive until they are
+            evicted, and the results of :meth:`marshal` share the memoized
+            dicts, so they must not be modified. Only use this if frozen
+            instances are never changed in place (e.g. through a list
+            field). Defaults to ``None`` (disabled).
         """
-        self._marshal_impl_cache = {}
-        self._unmarshal_impl_cache = {}
+        if cache_size is not None and cache_size < 1:
+            raise ValueError('cache_size must be at least 1, got %r' % (cache_size,))
+        self._init_args = {
+            'json_backend': json_backend,
+            'resolve_unions_by_shape': resolve_unions_by_shape,
+            'cache_size': cache_size,
+            'set_order': set_order,
+            'memo_size': memo_size,
+        }
+        if memo_size is not None and memo_size < 1:
+            raise ValueError('memo_size must be at least 1, got %r' % (memo_size,))
+        self.memo_size = memo_size
+        self.cache_size = cache_size
+        self.resolve_unions_by_shape = resolve_unions_by_shape
+        if not isinstance(json_backend, JsonBackend):
+            json_backend = get_json_backend(json_backend)
+        self.json_backend = json_backend
+        self._lock = threading.RLock()
+        self._hooks = []
+        self._frozen = False
+        self._marshal_tags = {}
+        self._marshal_impl_cache = self._make_cache()
+        self._unmarshal_impl_cache = self._make_cache()
         self._marshal_impl_dispatch = singledispatch(_marshal_default)
         self._unmarshal_lookup_dispatch = singledispatch(_unmarshal_lookup_default)
         self._unmarshal_hook_impl = {}
         self._unmarshal_hooks = set()
-        self._field_options_cache = {}
+        self._marshal_hooks = set()
+        self._profile_entries = None
+        self._profile_local = None
+        self._profile_lock = threading.Lock()
+        self._field_options_cache = self._make_cache()
+        self._lazy_unmarshal_cache = self._make_cache()
+        self._projection_cache = self._make_cache()
+        self._trusted_cache = self._make_cache()
+        self._marshal_memo = self._make_memo()
+        self._json_memo = self._make_memo()
 
         for type_ in SCALAR_TYPES:
             self._marshal_impl_dispatch.register(type_, IDENTITY)
 
         self._marshal_impl_dispatch.register(list, _marshal_list)
         self._marshal_impl_dispatch.register(tuple, _marshal_list)
-        self._marshal_impl_dispatch.register(set, _marshal_set)
-        self._marshal_impl_dispatch.register(frozenset, _marshal_set)
+        marshal_set = _make_marshal_set(set_order)
+        self._marshal_impl_dispatch.register(set, marshal_set)
+        self._marshal_impl_dispatch.register(frozenset, marshal_set)
         self._marshal_impl_dispatch.register(dict, _marshal_dict)
         self._marshal_impl_dispatch.register(Enum, _marshal_enum)
         self._marshal_impl_dispatch.register(IntEnum, _marshal_enum)
@@ -459,12 +2173,10 @@ class Registry:
 
         The reverse operation is :meth:`unmarshal`.
         """
-        key = obj.__class__
         try:
-            impl = self._marshal_impl_cache[key]
+            impl = self._marshal_impl_cache[obj.__class__]
         except KeyError:
-            impl = self.lookup_marshal_impl(key)
-            self._marshal_impl_cache[key] = impl
+            impl = self._resolve_marshal_impl(obj.__class__)
         if impl is IDENTITY:
             return obj
         else:
@@ -474,9 +2186,99 @@ class Registry:
         """
         Marshal an object to a JSON string.
 
-        Like :meth:`marshal`, but converts the result to JSON.
+        Like :meth:`marshal`, but converts the result to JSON. Depending on
+        the registry's JSON backend, the result is either a ``str`` or
+        ``bytes``.
+        """
+        return self.json_backend.dumps(self.marshal(obj))
+
+    def marshal_many(self, objs, generator=False):
+        """
+        Marshal each object in the iterable *objs*.
+
+        Returns a list of the results, or an iterator if *generator* is
+        ``True``. The marshal implementation is resolved once for each class
+        of object encountered, so this is faster than calling
+        :meth:`marshal` in a loop, in particular if all objects have the
+        same class.
+        """
+        if generator:
+            return self._iter_marshal_many(objs)
+        if not isinstance(objs, (list, tuple)):
+            objs = list(objs)
+        return _marshal_list(objs, self)
+
+    def _iter_marshal_many(self, objs):
+        cls = impl = None
+        for obj in objs:
+            if obj.__class__ is not cls:
+                cls = obj.__class__
+                impl = self._resolve_marshal_impl(cls)
+            yield obj if impl is IDENTITY else impl(obj, self)
+
+    def iter_marshal_json(self, obj, chunk_size=65536):
+        """
+        Marshal an object to JSON and return an iterator over the JSON text.
+
+        Unlike :meth:`marshal_json`, this walks the object graph while
+        writing JSON, without first building the complete JSON-compatible
+        data structure. The text is yielded in chunks of roughly *chunk_size*
+        characters. The output is always produced by the standard library
+        encoder, regardless of the registry's JSON backend.
+        """
+        chunk = []
+        size = 0
+        for piece in _iterencode(obj, self):
+            chunk.append(piece)
+            size += len(piece)
+            if size >= chunk_size:
+                yield ''.join(chunk)
+                chunk = []
+                size = 0
+        if chunk:
+            yield ''.join(chunk)
+
+    def dump(self, obj, fp, chunk_size=65536):
+        """
+        Marshal an object to JSON and write it to the text file *fp*.
+
+        Like :meth:`iter_marshal_json`, but writes each chunk to *fp*.
+        """
+        write = fp.write
+        for chunk in self.iter_marshal_json(obj, chunk_size):
+            write(chunk)
+
+    def marshal_diff(self, old, new, format='json-patch'):
+        """
+        Return a patch that describes the changes from *old* to *new*.
+
+        *format* is either "json-patch" (the default) for a JSON Patch
+        (RFC 6902) or "merge-patch" for a JSON Merge Patch (RFC 7386). The
+        patch applies to the marshalled form of *old*, using the same field
+        names and options as :meth:`marshal`. An empty patch (``[]`` or
+        ``{}``) means that nothing changed.
+
+        Objects of the same attrs class are compared field by field and
+        dicts key by key. Fields that refer to the same object are skipped
+        without being marshalled, so the work is proportional to the size
+        of the changes. Other values, such as lists, are compared after
+        marshalling and replaced as a whole if they differ.
+
+        In a JSON Merge Patch, ``null`` always removes a key, so ``None``
+        can't be set: a field that changes to ``None`` is removed when the
+        patch is applied (unless it is marshalled with ``omit_if_none``),
+        and so are ``None`` values inside added or replaced objects, which
+        can make the patch fail to apply. JSON Patch round-trips all
+        values.
+
+        The reverse operation is :meth:`apply_patch`.
         """
-        return json.dumps(self.marshal(obj))
+        _check_patch_format(format)
+        ops = []
+        _diff(old, new, [], ops, self)
+        if format == 'json-patch':
+            return _ops_to_json_patch(ops)
+        return _ops_to_merge_patch(ops)
 
     def add_marshal_hook(self, type_, fn):
         """
@@ -496,8 +2298,12 @@ class Registry:
             hook_impl = hook.fn
         else:
             hook_impl = lambda obj, _: hook.fn(obj)
-        self._marshal_impl_dispatch.register(type_, hook_impl)
-        self._marshal_impl_cache.clear()
+        with self._lock:
+            self._check_not_frozen()
+            self._marshal_impl_dispatch.register(type_, hook_impl)
+            self._marshal_hooks.add(hook_impl)
+            self._replace_caches('_marshal_impl_cache')
+            self._hooks.append(('marshal', type_, hook))
 
     def lookup_marshal_impl(self, cls):
         """
@@ -505,10 +2311,10 @@ class Registry:
         """
         impl = self._marshal_impl_dispatch.dispatch(cls)
         if impl is _marshal_default and attr.has(cls):
-            return _marshal_attrs
+            return _compile_marshal_attrs(cls, self)
         return impl
 
-    def unmarshal(self, obj, type_hint):
+    def unmarshal(self, obj, type_hint, lazy=False, fields=None, trusted=False):
         """
         Unmarshal an object from a JSON-compatible data structure.
 
@@ -523,26 +2329,310 @@ class Registry:
         Raises ``UnmarshalError`` if the data cannot be unmarshalled to the
         desired type.
 
+        If *lazy* is ``True``, attrs classes are unmarshalled lazily: fields
+        containing other attrs classes or containers are only unmarshalled
+        when they are first accessed, and errors in those fields are raised
+        at that point. Lazy instances are of a generated subclass of the
+        requested class and are created without calling ``__init__``.
+
+        *fields* is an optional set of dotted paths of attribute names, such
+        as ``{"id", "public_net.ipv4.ip"}``. If given, only the selected
+        fields are unmarshalled (a path ending in a struct selects all of its
+        fields). Paths continue through containers to their items. Other
+        fields are set to their default value, or are left unset if they
+        don't have one. Instances are created without calling ``__init__``.
+        Paths are checked against the type, and a path that doesn't lead to
+        an attribute (or continues past a field without attributes) raises
+        ``ValueError``, even if *obj* doesn't contain that part.
+
+        If *trusted* is ``True``, *obj* is assumed to be valid, for example
+        because it was produced by :meth:`marshal`. Values are not checked
+        against their types, and attrs instances are created without calling
+        ``__init__``, so validators and converters don't run. Invalid data
+        results in invalid objects rather than an ``UnmarshalError``.
+        Missing keys without a default still raise ``UnmarshalError``.
+
         The reverse operation is :meth:`marshal`.
         """
+        if trusted:
+            if lazy or fields is not None:
+                raise ValueError("Can't combine trusted with lazy or fields")
+            return self._unmarshal_trusted(obj, type_hint)
+        if fields is not None:
+            if lazy:
+                raise ValueError("Can't combine lazy and fields")
+            return self._unmarshal_projected(obj, type_hint, fields)
+        if lazy:
+            return self._unmarshal_lazy(obj, type_hint)
         key = (obj.__class__, type_hint)
         try:
             impl, type_ = self._unmarshal_impl_cache[key]
         except KeyError:
-            impl, type_ = self.lookup_unmarshal_impl(*key)
-            self._unmarshal_impl_cache[key] = impl, type_
+            impl, type_ = self._resolve_unmarshal_impl(*key)
         if impl is IDENTITY:
             return obj
         else:
             return impl(obj, type_, self)
 
-    def unmarshal_json(self, data, type_hint):
+    def unmarshal_json(self, data, type_hint, lazy=False, fields=None, trusted=False):
         """
         Unmarshal an object from a JSON string.
 
         Like :meth:`unmarshal`, but accepts a data in JSON format.
+
+        *data* can be a ``str``, or UTF-8 encoded JSON as ``bytes``,
+        ``bytearray``, ``memoryview`` or ``mmap.mmap``. It can also be the
+        path of a JSON file as an ``os.PathLike`` object (such as
+        ``pathlib.Path``), which is memory-mapped for reading. Binary data is
+        handed to the JSON backend without copying if the backend supports
+        it (see :class:`JsonBackend`).
+        """
+        return self.unmarshal(self._loads(data), type_hint, lazy, fields, trusted)
+
+    def _loads(self, data):
+        backend = self.json_backend
+        if isinstance(data, (str, bytes)):
+            return backend.loads(data)
+        elif isinstance(data, os.PathLike):
+            return self._load_file(data)
+        elif isinstance(data, mmap.mmap):
+            with memoryview(data) as view:
+                return self._loads(view)
+        elif isinstance(data, (bytearray, memoryview)):
+            if backend.buffers:
+                return backend.loads(data)
+            return backend.loads(str(data, 'utf-8'))
+        return backend.loads(data)
+
+    def _load_file(self, path):
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return self.json_backend.loads(b'')
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return self._loads(data)
+
+    def _unmarshal_projected(self, obj, type_hint, fields):
+        key = (type_hint, frozenset(fields))
+        try:
+            project = self._projection_cache[key]
+        except KeyError:
+            with self._lock:
+                cache = self._projection_cache
+                project = cache.get(key)
+                if project is None:
+                    cache.misses += 1
+                    tree = _projection_tree(fields)
+                    unknown = _unknown_projection_paths(type_hint, tree, self)
+                    if unknown:
+                        raise ValueError('Unknown fields in projection for %s: %s'
+                                         % (type_hint, ', '.join(sorted(unknown))))
+                    project = _make_projection(type_hint, tree, self)
+                    cache[key] = project
+        return project(obj)
+
+    def apply_patch(self, obj, patch, type_hint=None, format='json-patch'):
+        """
+        Apply a patch, as returned by :meth:`marshal_diff`, to *obj* and
+        return the result as a new object. *obj* is not modified.
+
+        *type_hint* is the type of the result and defaults to the class of
+        *obj*. *format* is "json-patch" (the default) or "merge-patch", see
+        :meth:`marshal_diff`. Only the changed parts are unmarshalled: attrs
+        instances are copied with ``attr.evolve``, and unchanged fields and
+        dict values are shared with *obj*. JSON Patches may only contain
+        "add", "replace" and "remove" operations on object members.
+        """
+        _check_patch_format(format)
+        if format == 'json-patch':
+            tree = _json_patch_tree(patch)
+        else:
+            tree = _merge_patch_tree(patch)
+        if type_hint is None:
+            type_hint = obj.__class__
+        return _apply_tree(obj, tree, type_hint, self)
+
+    def _unmarshal_trusted(self, obj, type_hint):
+        try:
+            unmarshal_trusted = self._trusted_cache[type_hint]
+        except KeyError:
+            with self._lock:
+                cache = self._trusted_cache
+                unmarshal_trusted = cache.get(type_hint)
+                if unmarshal_trusted is None:
+                    cache.misses += 1
+                    if attr.has(type_hint) and not self._hook_exists_for(dict, type_hint):
+                        unmarshal_trusted = _compile_trusted_unmarshal_attrs(type_hint, self)
+                    else:
+                        unmarshal_trusted = _make_trusted(type_hint, self) or IDENTITY
+                    cache[type_hint] = unmarshal_trusted
+        if unmarshal_trusted is IDENTITY:
+            return obj
+        return unmarshal_trusted(obj)
+
+    def _unmarshal_lazy(self, obj, type_hint):
+        impl, type_ = self._resolve_unmarshal_impl(obj.__class__, type_hint)
+        if impl is IDENTITY:
+            return obj
+        cls = getattr(impl, 'attrs_class', None)
+        if cls is None:
+            return impl(obj, type_, self)
+        try:
+            unmarshal_lazy = self._lazy_unmarshal_cache[cls]
+        except KeyError:
+            with self._lock:
+                cache = self._lazy_unmarshal_cache
+                unmarshal_lazy = cache.get(cls)
+                if unmarshal_lazy is None:
+                    cache.misses += 1
+                    unmarshal_lazy = _make_lazy_unmarshal(cls, self)
+                    cache[cls] = unmarshal_lazy
+        return unmarshal_lazy(obj)
+
+    def unmarshal_many(self, datas, type_hint, generator=False):
         """
-        return self.unmarshal(json.loads(data), type_hint)
+        Unmarshal each item in the iterable *datas* to *type_hint*.
+
+        Returns a list of the results, or an iterator if *generator* is
+        ``True``. The unmarshal implementation is resolved once for each
+        class of data encountered, so this is faster than calling
+        :meth:`unmarshal` in a loop.
+        """
+        if generator:
+            return self._iter_unmarshal_many(datas, type_hint)
+        if not isinstance(datas, list):
+            datas = list(datas)
+        impl, type_ = self._resolve_unmarshal_impl(list, List[type_hint])
+        return impl(datas, type_, self)
+
+    def _iter_unmarshal_many(self, datas, type_hint):
+        cls = impl = type_ = None
+        for data in datas:
+            if data.__class__ is not cls:
+                cls = data.__class__
+                impl, type_ = self._resolve_unmarshal_impl(cls, type_hint)
+            yield data if impl is IDENTITY else impl(data, type_, self)
+
+    def unmarshal_json_parallel(self, data, type_hint, workers=None, chunks_per_worker=4):
+        """
+        Unmarshal a JSON array using a pool of worker processes.
+
+        *type_hint* must be a ``List[…]`` type. The JSON data is parsed in
+        the calling process, then the elements are split into chunks and
+        unmarshalled in a :class:`concurrent.futures.ProcessPoolExecutor`
+        with *workers* processes (default: the number of CPUs). The result
+        is a list in the original order.
+
+        The registry is pickled and sent to the workers, so all hooks
+        (including field hooks), a ``set_order`` callable and a custom
+        :class:`JsonBackend` must be picklable, e.g. module-level functions
+        instead of lambdas. ``pickle.PicklingError`` is raised before any
+        worker is started if the registry can't be pickled. If
+        unmarshalling an element fails, ``UnmarshalError`` is raised with
+        the index of the element.
+        """
+        if getattr(type_hint, '__origin__', None) not in {list, List}:
+            raise UnmarshalError(
+                "Can't unmarshal to %s in parallel, expected List[…]" % (type_hint,))
+        item_type, = type_hint.__args__
+        items = self._loads(data)
+        if not isinstance(items, list):
+            raise UnmarshalError("Can't unmarshal to %s: %r" % (type_hint, items))
+
+        workers = workers or os.cpu_count() or 1
+        if workers == 1:
+            return _unmarshal_chunk(self, items, item_type, 0)
+
+        try:
+            pickle.dumps(self)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            raise pickle.PicklingError(
+                "Can't send the registry to worker processes, its hooks, "
+                "set_order and JSON backend must be picklable: %s" % e) from e
+
+        size = max(1, -(-len(items) // (workers * chunks_per_worker)))
+        offsets = range(0, len(items), size)
+        with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                 initargs=(self,)) as executor:
+            results = executor.map(
+                _unmarshal_worker_chunk,
+                [items[i:i + size] for i in offsets],
+                [item_type] * len(offsets),
+                offsets,
+            )
+            return [obj for result in results for obj in result]
+
+    def iter_unmarshal(self, fp, item_type, format='auto', chunk_size=65536):
+        """
+        Unmarshal a stream of JSON values from a file, one value at a time.
+
+        *fp* is a file object opened in text or binary (UTF-8) mode. The
+        file contains either a JSON array or JSON Lines (one JSON value per
+        line), as selected by *format*, which is one of "array", "lines" or
+        "auto". "auto" treats a file that starts with "[" as an array.
+
+        Yields every element unmarshalled to *item_type*. The file is read
+        in chunks of *chunk_size*, so memory usage is bounded by the size of
+        the largest element, not the size of the file. JSON Lines are parsed
+        with the registry's JSON backend, array elements with the standard
+        library.
+        """
+        decoder = _JsonStreamDecoder(self.json_backend.loads, format)
+        while True:
+            data = fp.read(chunk_size)
+            if not data:
+                break
+            for value in decoder.feed(data):
+                yield self.unmarshal(value, item_type)
+        for value in decoder.close():
+            yield self.unmarshal(value, item_type)
+
+    async def aiter_unmarshal(self, reader, item_type, format='auto', chunk_size=65536,
+                              yield_every=100):
+        """
+        Asynchronous version of :meth:`iter_unmarshal`, for use with
+        ``async for``.
+
+        *reader* is any object with a coroutine method ``read(n)`` returning
+        ``str`` or UTF-8 encoded ``bytes``, such as
+        :class:`asyncio.StreamReader`. Control is returned to the event
+        loop after every *yield_every* elements, so decoding a large chunk
+        does not block other tasks for long.
+        """
+        decoder = _JsonStreamDecoder(self.json_backend.loads, format)
+        count = 0
+        while True:
+            data = await reader.read(chunk_size)
+            if not data:
+                break
+            for value in decoder.feed(data):
+                yield self.unmarshal(value, item_type)
+                count += 1
+                if count % yield_every == 0:
+                    await asyncio.sleep(0)
+        for value in decoder.close():
+            yield self.unmarshal(value, item_type)
+
+    async def aunmarshal(self, obj, type_hint, executor=None, **kw):
+        """
+        Run :meth:`unmarshal` in *executor* and return the result. Keyword
+        arguments are passed to :meth:`unmarshal`.
+
+        *executor* defaults to the event loop's default executor (a thread
+        pool). This keeps the event loop responsive while a large document
+        is unmarshalled.
+        """
+        loop = get_running_loop()
+        return await loop.run_in_executor(
+            executor, partial(self.unmarshal, obj, type_hint, **kw))
+
+    async def aunmarshal_json(self, data, type_hint, executor=None, **kw):
+        """
+        Like :meth:`aunmarshal`, but runs :meth:`unmarshal_json`, so that
+        the JSON document is also parsed in *executor*.
+        """
+        loop = get_running_loop()
+        return await loop.run_in_executor(
+            executor, partial(self.unmarshal_json, data, type_hint, **kw))
 
     def add_unmarshal_hook(self, type_, fn):
         """
@@ -566,12 +2656,68 @@ class Registry:
             hook_impl = hook.fn
         else:
             hook_impl = lambda obj, _, __: hook.fn(obj)
-        self._unmarshal_hook_impl[type_] = hook_impl
-        self._unmarshal_hooks.add(hook_impl)
-        if getattr(type_, '__mro__', None) is not None:
-            lookup = lambda _, __, ___: hook_impl
-            self._unmarshal_lookup_dispatch.register(type_, lookup)
-            self._unmarshal_impl_cache.clear()
+        with self._lock:
+            self._check_not_frozen()
+            self._unmarshal_hook_impl[type_] = hook_impl
+            self._unmarshal_hooks.add(hook_impl)
+            if getattr(type_, '__mro__', None) is not None:
+                lookup = lambda _, __, ___: hook_impl
+                self._unmarshal_lookup_dispatch.register(type_, lookup)
+                self._replace_caches('_unmarshal_impl_cache')
+            self._replace_caches('_projection_cache', '_trusted_cache')
+            self._hooks.append(('unmarshal', type_, hook))
+
+    def add_tagged_union(self, type_hint, key, tags):
+        """
+        Register a tagged (discriminated) union.
+
+        *type_hint* is a ``Union`` of attrs classes, *key* is the name of the
+        JSON object key that holds the tag, and *tags* is a dict mapping tag
+        values to the members of the union.
+
+        When unmarshalling to *type_hint*, the class to create is looked up
+        by the value of *key*. When marshalling an instance of any of the
+        classes, *key* is added to the result with the class' tag as its
+        value, unless the class has a field with the same (JSON) name.
+        If *type_hint* is ``Optional[…]``, ``None`` is unmarshalled as is.
+        """
+        tags = dict(tags)
+        args = getattr(type_hint, '__args__', ())
+        members = {t for t in args if t is not NONE_TYPE}
+        if getattr(type_hint, '__origin__', None) is not Union or \
+                members != set(tags.values()):
+            raise ValueError(
+                'Tags must map to the members of a Union, got %r for %s' % (tags, type_hint))
+        optional = NONE_TYPE in args
+
+        def unmarshal_tagged(obj, type_hint, registry):
+            if obj is None and optional:
+                return None
+            try:
+                cls = tags[obj[key]]
+            except KeyError:
+                if key not in obj:
+                    raise UnmarshalError('missing key: %r' % key) from None
+                raise UnmarshalError(
+                    'Unknown tag for %s: %r' % (type_hint, obj[key])) from None
+            except TypeError:
+                raise UnmarshalError(
+                    "Can't unmarshal to %s: %r" % (type_hint, obj)) from None
+            return registry.unmarshal(obj, cls)
+
+        with self._lock:
+            self._check_not_frozen()
+            for tag, cls in tags.items():
+                if self._marshal_tags.get(cls, (key, tag)) != (key, tag):
+                    raise ValueError('%s already has a different tag: %r'
+                                     % (cls, self._marshal_tags[cls]))
+            for tag, cls in tags.items():
+                self._marshal_tags[cls] = (key, tag)
+            self._unmarshal_hook_impl[type_hint] = unmarshal_tagged
+            self._unmarshal_hooks.add(unmarshal_tagged)
+            self._replace_caches('_marshal_impl_cache', '_unmarshal_impl_cache',
+                                 '_projection_cache', '_trusted_cache')
+            self._hooks.append(('tagged_union', type_hint, (key, tags)))
 
     def lookup_unmarshal_impl(self, cls, type_hint):
         """
@@ -589,7 +2735,9 @@ class Registry:
             lookup = self._unmarshal_lookup_dispatch.dispatch(type_hint)
             impl = lookup(cls, type_hint, self)
             if impl is _unmarshal_default and attr.has(type_hint):
-                return _unmarshal_attrs, type_hint
+                if not issubclass(cls, Mapping):
+                    return _unmarshal_default, type_hint
+                return _compile_unmarshal_attrs(type_hint, self), type_hint
             return impl, type_hint
         else:
             origin = getattr(type_hint, '__origin__', None)
@@ -603,26 +2751,303 @@ class Registry:
 
         return _unmarshal_default, type_hint
 
+    def compile(self, *types, freeze=False):
+        """
+        Resolve and cache the marshal and unmarshal implementations for
+        *types* and all types reachable from them.
+
+        The registry normally fills its caches on first use. Calling this
+        method ahead of time, for example at application startup, moves that
+        work out of the first requests. Types are followed through attrs
+        fields and the arguments of typing constructs such as ``List[…]`` and
+        ``Union[…]``. Unmarshal implementations are
+        resolved for every JSON type that the data could have.
+
+        If *freeze* is ``True``, the registry is frozen afterwards: adding
+        hooks or tagged unions, clearing the caches and enabling or disabling
+        profiling raise ``RuntimeError``, so the compiled implementations are
+        never invalidated. With ``cache_size`` set, they can still be evicted
+        and are then resolved again.
+        """
+        seen = set()
+        stack = list(types)
+        while stack:
+            type_hint = stack.pop()
+            if type_hint in seen or type_hint is Any or type_hint is Ellipsis:
+                continue
+            seen.add(type_hint)
+
+            for cls in JSON_TYPES:
+                try:
+                    self._resolve_unmarshal_impl(cls, type_hint)
+                except UnmarshalError:
+                    pass
+
+            if getattr(type_hint, '__mro__', None) is not None:
+                self._resolve_marshal_impl(type_hint)
+                if attr.has(type_hint):
+                    for field in type_hint.__attrs_attrs__:
+                        options = self._get_field_options(type_hint, field)
+                        if not options.omit and options.unmarshal is None:
+                            stack.append(field.type or Any)
+            else:
+                origin = getattr(type_hint, '__origin__', None)
+                if getattr(origin, '__mro__', None) is not None:
+                    self._resolve_marshal_impl(origin)
+                stack.extend(getattr(type_hint, '__args__', None) or ())
+
+        if freeze:
+            self._frozen = True
+
+    def _check_not_frozen(self):
+        if self._frozen:
+            raise RuntimeError("Can't modify a frozen registry")
+
     def clear_cache(self):
         """
         Clear all caches of the registry.
 
         This should not be necessary unless classes are modified at runtime.
         """
-        self._marshal_impl_cache.clear()
-        self._unmarshal_impl_cache.clear()
-        self._marshal_impl_dispatch._clear_cache()
-        self._unmarshal_lookup_dispatch._clear_cache()
-        self._field_options_cache.clear()
+        with self._lock:
+            self._check_not_frozen()
+            self._marshal_impl_dispatch._clear_cache()
+            self._unmarshal_lookup_dispatch._clear_cache()
+            self._replace_caches(*CACHE_NAMES.values())
+
+    def _replace_caches(self, *names):
+        # Caches are replaced instead of cleared: a thread that is still
+        # resolving an impl with the old hooks then writes it to the old
+        # cache, and new lookups start from the new, empty one. Statistics
+        # are carried over.
+        if '_marshal_impl_cache' in names and self.memo_size is not None:
+            names += ('_marshal_memo', '_json_memo')
+        for name in names:
+            old = getattr(self, name)
+            new = self._make_memo() if name in MEMO_NAMES.values() else self._make_cache()
+            new.hits, new.misses, new.evictions = old.hits, old.misses, old.evictions
+            setattr(self, name, new)
+
+    def cache_info(self):
+        """
+        Return a dict of :class:`CacheInfo` objects with statistics for each
+        of the registry's caches: ``"marshal"`` and ``"unmarshal"``
+        (resolved implementations), ``"field_options"``, ``"lazy"``,
+        ``"projection"`` and ``"trusted"``. If ``memo_size`` is set, the
+        memos of marshalled frozen instances are included as ``"memo"``
+        and ``"json_memo"``.
+        """
+        names = dict(CACHE_NAMES)
+        if self.memo_size is not None:
+            names.update(MEMO_NAMES.items())
+        return {key: getattr(self, name).info() for key, name in names.items()}
+
+    def _make_memo(self):
+        if self.memo_size is None:
+            return None
+        return _Memo(self.memo_size)
+
+    def _make_cache(self):
+        if self.cache_size is None:
+            return _Cache()
+        return _LruCache(self.cache_size)
+
+    def enable_profiling(self):
+        """
+        Start recording call counts and timings for each marshal and
+        unmarshal implementation, see :meth:`profile_snapshot`.
+
+        Implementations are wrapped when they are resolved, so this clears
+        the registry's caches. Values that are returned unchanged (such as
+        ``str`` or ``int`` fields) are not recorded. While profiling is
+        disabled, which is the default, there is no overhead.
+        """
+        with self._lock:
+            self._check_not_frozen()
+            if self._profile_entries is None:
+                self._profile_entries = {}
+                self._profile_local = threading.local()
+                self.clear_cache()
+
+    def disable_profiling(self):
+        """
+        Stop profiling and discard the recorded statistics.
+        """
+        with self._lock:
+            self._check_not_frozen()
+            if self._profile_entries is not None:
+                self._profile_entries = None
+                self._profile_local = None
+                self.clear_cache()
+
+    def profile_snapshot(self, reset=False):
+        """
+        Return a list of :class:`ProfileEntry` objects with the statistics
+        recorded since profiling was enabled or last reset, sorted by self
+        time (highest first). If *reset* is ``True``, the statistics are
+        reset afterwards.
+
+        Returns an empty list if profiling is not enabled.
+        """
+        entries = self._profile_entries
+        if entries is None:
+            return []
+        with self._profile_lock:
+            snapshot = [attr.evolve(entry) for entry in list(entries.values())]
+            if reset:
+                self._reset_profile_entries(entries)
+        snapshot.sort(key=lambda entry: entry.self_time, reverse=True)
+        return snapshot
+
+    def reset_profile(self):
+        """
+        Reset the statistics recorded while profiling.
+        """
+        entries = self._profile_entries
+        if entries is not None:
+            with self._profile_lock:
+                self._reset_profile_entries(entries)
+
+    def _reset_profile_entries(self, entries):
+        for entry in list(entries.values()):
+            entry.calls = entry.items = 0
+            entry.total_time = entry.self_time = 0.0
+
+    def _profile(self, operation, type_, impl, hook, field=None):
+        key = (operation, type_, hook, field)
+        entry = self._profile_entries.get(key)
+        if entry is None:
+            entry = self._profile_entries[key] = ProfileEntry(
+                operation, type_, hook, field=field)
+        return _make_profiled(impl, entry, self._profile_local, self._profile_lock)
+
+    def _profile_field_hooks(self, cls, field, options):
+        # Field hooks are called directly by the generated code, so they are
+        # wrapped in the options. Profiling replaces the options cache.
+        changes = {}
+        for operation in 'marshal', 'unmarshal':
+            hook = getattr(options, operation)
+            if hook is not None:
+                changes[operation] = self._profile(operation, cls, hook, True, field.name)
+        return attr.evolve(options, **changes) if changes else options
+
+    # Cache hits don't lock. Misses are resolved while holding the registry
+    # lock, so they can't interleave with adding a hook, which would store
+    # an impl that was resolved with the old hooks in the new cache.
+
+    def _resolve_marshal_impl(self, cls):
+        try:
+            return self._marshal_impl_cache[cls]
+        except KeyError:
+            pass
+        with self._lock:
+            cache = self._marshal_impl_cache
+            impl = cache.get(cls)
+            if impl is None:
+                cache.misses += 1
+                impl = self.lookup_marshal_impl(cls)
+                if self._marshal_memo is not None and _is_frozen(cls) and \
+                        getattr(impl, 'attrs_fields', None) is not None:
+                    impl = _make_memoized(impl, self._marshal_memo)
+                if self._profile_entries is not None and impl is not IDENTITY:
+                    impl = self._profile('marshal', cls, impl, impl in self._marshal_hooks)
+                cache[cls] = impl
+            return impl
+
+    def _resolve_unmarshal_impl(self, cls, type_hint):
+        key = (cls, type_hint)
+        try:
+            return self._unmarshal_impl_cache[key]
+        except KeyError:
+            pass
+        with self._lock:
+            cache = self._unmarshal_impl_cache
+            result = cache.get(key)
+            if result is None:
+                cache.misses += 1
+                impl, type_ = self.lookup_unmarshal_impl(cls, type_hint)
+                if self._profile_entries is not None and impl is not IDENTITY:
+                    impl = self._profile('unmarshal', type_, impl, impl in self._unmarshal_hooks)
+                result = cache[key] = impl, type_
+            return result
+
+    def _get_field_options(self, cls, field):
+        key = (cls, field.name)
+        try:
+            return self._field_options_cache[key]
+        except KeyError:
+            pass
+        with self._lock:
+            cache = self._field_options_cache
+            options = cache.get(key)
+            if options is None:
+                cache.misses += 1
+                options = field.metadata.get('fieldmarshal', DEFAULT_OPTIONS)
+                if self._profile_entries is not None:
+                    options = self._profile_field_hooks(cls, field, options)
+                cache[key] = options
+            return options
+
+    def __getstate__(self):
+        # Caches and dispatch tables contain generated functions and lambdas,
+        # so only the arguments needed to rebuild the registry are pickled.
+        return {'args': self._init_args, 'hooks': self._hooks}
+
+    def __setstate__(self, state):
+        self.__init__(**state['args'])
+        for kind, type_, hook in state['hooks']:
+            if kind == 'marshal':
+                self.add_marshal_hook(type_, hook)
+            elif kind == 'unmarshal':
+                self.add_unmarshal_hook(type_, hook)
+            else:
+                self.add_tagged_union(type_, *hook)
 
     def _hook_exists_for(self, cls, type_hint):
         impl, _ = self.lookup_unmarshal_impl(cls, type_hint)
         return impl in self._unmarshal_hooks
 
 
+def _unmarshal_chunk(registry, items, item_type, offset):
+    try:
+        return registry.unmarshal_many(items, item_type)
+    except Exception as e:
+        error = e
+    # Unmarshal the items one by one to find the one that failed.
+    for i, item in enumerate(items, offset):
+        try:
+            registry.unmarshal(item, item_type)
+        except Exception as e:
+            raise UnmarshalError('Error unmarshalling element %d: %s' % (i, e)) from e
+    raise error
+
+
+_worker_registry = None
+
+
+def _init_worker(registry):
+    global _worker_registry
+    _worker_registry = registry
+
+
+def _unmarshal_worker_chunk(items, item_type, offset):
+    return _unmarshal_chunk(_worker_registry, items, item_type, offset)
+
+
 DEFAULT_REGISTRY = Registry()
 
 marshal = DEFAULT_REGISTRY.marshal
 marshal_json = DEFAULT_REGISTRY.marshal_json
+marshal_diff = DEFAULT_REGISTRY.marshal_diff
+marshal_many = DEFAULT_REGISTRY.marshal_many
+iter_marshal_json = DEFAULT_REGISTRY.iter_marshal_json
+dump = DEFAULT_REGISTRY.dump
 unmarshal = DEFAULT_REGISTRY.unmarshal
 unmarshal_json = DEFAULT_REGISTRY.unmarshal_json
+unmarshal_many = DEFAULT_REGISTRY.unmarshal_many
+apply_patch = DEFAULT_REGISTRY.apply_patch
+unmarshal_json_parallel = DEFAULT_REGISTRY.unmarshal_json_parallel
+iter_unmarshal = DEFAULT_REGISTRY.iter_unmarshal
+aiter_unmarshal = DEFAULT_REGISTRY.aiter_unmarshal
+aunmarshal = DEFAULT_REGISTRY.aunmarshal
+aunmarshal_json = DEFAULT_REGISTRY.aunmarshal_json
@@ -0,0 +1,95 @@
+import asyncio
+import io
+from typing import List
+
+import pytest
+from pytest import raises as assert_raises
+from fieldmarshal import (
+    Registry, UnmarshalError, aiter_unmarshal, aunmarshal, aunmarshal_json, marshal_json, struct,
+)
+
+
+@struct
+class Foo:
+    id: int
+    name: str
+
+
+FOOS = [Foo(i, 'ä' * i) for i in range(50)]
+
+
+class Reader:
+    def __init__(self, data):
+        self.fp = io.BytesIO(data) if isinstance(data, bytes) else io.StringIO(data)
+        self.reads = 0
+
+    async def read(self, n):
+        self.reads += 1
+        await asyncio.sleep(0)
+        return self.fp.read(n)
+
+
+async def collect(reader, item_type, **kw):
+    return [obj async for obj in aiter_unmarshal(reader, item_type, **kw)]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 65536])
+@pytest.mark.parametrize('binary', [False, True])
+def test_aiter_unmarshal_array(chunk_size, binary):
+    data = marshal_json(FOOS)
+    reader = Reader(data.encode('utf-8') if binary else data)
+    assert asyncio.run(collect(reader, Foo, chunk_size=chunk_size)) == FOOS
+
+
+def test_aiter_unmarshal_lines():
+    data = ''.join(marshal_json(foo) + '\n' for foo in FOOS).encode('utf-8')
+    assert asyncio.run(collect(Reader(data), Foo, chunk_size=5)) == FOOS
+
+
+def test_aiter_unmarshal_yields_to_loop():
+    data = marshal_json(list(range(1000)))
+    ticks = []
+
+    async def tick():
+        while True:
+            ticks.append(None)
+            await asyncio.sleep(0)
+
+    async def main():
+        task = asyncio.ensure_future(tick())
+        await asyncio.sleep(0)
+        reader = Reader(data)
+        before = len(ticks)
+        # A single read returns all elements.
+        result = await collect(reader, int, yield_every=10)
+        assert reader.reads == 2
+        task.cancel()
+        return result, len(ticks) - before
+
+    result, ticked = asyncio.run(main())
+    assert result == list(range(1000))
+    assert ticked >= 100
+
+
+def test_aiter_unmarshal_errors():
+    with assert_raises(UnmarshalError):
+        asyncio.run(collect(Reader('[{"id": "x", "name": "y"}]'), Foo))
+    with assert_raises(ValueError):
+        asyncio.run(collect(Reader('[1, 2'), int))
+    with assert_raises(ValueError):
+        asyncio.run(collect(Reader(b'[1, 2]\xc3'), int))
+
+
+def test_aunmarshal():
+    data = [{'id': 1, 'name': 'x'}]
+    assert asyncio.run(aunmarshal(data, List[Foo])) == [Foo(1, 'x')]
+    assert asyncio.run(aunmarshal_json(marshal_json(FOOS), List[Foo])) == FOOS
+    assert asyncio.run(aunmarshal(data, List[Foo], fields={'id'}))[0].id == 1
+    with assert_raises(UnmarshalError):
+        asyncio.run(aunmarshal_json('[1]', List[Foo]))
+
+
+def test_aunmarshal_registry():
+    r = Registry()
+    r.add_unmarshal_hook(Foo, lambda s: Foo(0, s))
+    assert asyncio.run(r.aunmarshal_json('"x"', Foo)) == Foo(0, 'x')
@@ -0,0 +1,75 @@
+import pickle
+from typing import List
+
+import attr
+from pytest import raises as assert_raises
+from fieldmarshal import Registry, struct
+
+
+@struct
+class Point:
+    x: int
+    y: int
+
+
+def make_class(i):
+    return attr.make_class('Dynamic%d' % i, ['value'])
+
+
+def test_cache_info_unbounded():
+    r = Registry()
+    r.marshal(Point(1, 2))
+    r.marshal(Point(1, 2))
+    info = r.cache_info()['marshal']
+    assert info.hits is None
+    assert info.misses == 1
+    assert info.evictions == 0
+    assert info.size == 1
+    assert info.maxsize is None
+
+
+def test_cache_bounded():
+    r = Registry(cache_size=4)
+    for i in range(10):
+        cls = make_class(i)
+        assert r.unmarshal({'value': i}, cls) == cls(i)
+        assert r.marshal(cls(i)) == {'value': i}
+    info = r.cache_info()
+    assert info['marshal'].size == 4
+    assert info['marshal'].maxsize == 4
+    assert info['marshal'].evictions == 7  # 10 classes + int
+    assert info['unmarshal'].size == 4
+    assert info['field_options'].size == 4
+
+
+def test_cache_lru():
+    r = Registry(cache_size=3)
+    classes = [make_class(i) for i in range(3)]
+    r.marshal(classes[0](1))
+    r.marshal(classes[1](1))
+    r.marshal(classes[0](1))
+    r.marshal(classes[2](1))
+    assert set(r._marshal_impl_cache) == {classes[0], classes[2], int}
+    info = r.cache_info()['marshal']
+    assert info.hits == 4
+    assert info.misses == 4
+    assert info.evictions == 1
+
+
+def test_cache_bounded_containers():
+    r = Registry(cache_size=1)
+    data = [{'x': 1, 'y': 2}, {'x': 3, 'y': 4}]
+    assert r.unmarshal(data, List[Point]) == [Point(1, 2), Point(3, 4)]
+    assert r.marshal([Point(1, 2)]) == [{'x': 1, 'y': 2}]
+    assert r.unmarshal(data, List[Point], lazy=True) == [Point(1, 2), Point(3, 4)]
+    assert r.unmarshal(data, List[Point], fields={'x'})[0].x == 1
+
+
+def test_cache_size_invalid():
+    with assert_raises(ValueError):
+        Registry(cache_size=0)
+
+
+def test_cache_size_pickle():
+    r = pickle.loads(pickle.dumps(Registry(cache_size=3)))
+    assert r.cache_info()['marshal'].maxsize == 3
@@ -0,0 +1,92 @@
+from enum import Enum
+from typing import Dict, List, Optional, Tuple, Union
+
+from pytest import raises as assert_raises
+from fieldmarshal import Registry, UnmarshalError, field, struct
+
+
+class Status(Enum):
+    ON = 'on'
+
+
+@struct
+class Net:
+    ip: str
+
+
+@struct
+class Server:
+    id: int
+    status: Status
+    nets: List[Net]
+    labels: Dict[str, Tuple[int, ...]]
+    parent: Optional['Server'] = None
+    other: Union[int, Net] = 0
+    raw: str = field(default='', unmarshal=lambda s: s)
+
+
+DATA = {
+    'id': 1,
+    'status': 'on',
+    'nets': [{'ip': 'x'}],
+    'labels': {'a': [1, 2]},
+    'other': {'ip': 'y'},
+}
+
+
+def test_compile():
+    r = Registry()
+    r.compile(Server)
+
+    marshal_cache = dict(r._marshal_impl_cache)
+    unmarshal_cache = dict(r._unmarshal_impl_cache)
+    assert {Server, Net, Status, list, dict, int, str} <= set(marshal_cache)
+    assert (dict, Server) in unmarshal_cache
+    assert (dict, Net) in unmarshal_cache
+    assert (list, List[Net]) in unmarshal_cache
+    assert (str, Status) in unmarshal_cache
+    assert (dict, Union[int, Net]) in unmarshal_cache
+    assert (list, Tuple[int, ...]) in unmarshal_cache
+
+    server = r.unmarshal(DATA, Server)
+    assert r.unmarshal(r.marshal(server), Server) == server
+    assert r._marshal_impl_cache == marshal_cache
+    assert r._unmarshal_impl_cache == unmarshal_cache
+
+
+@struct
+class Scalars:
+    number: Union[int, float]
+    either: Union[int, str]
+    maybe: Optional[Union[int, str]] = None
+    many: List[Union[int, str]] = field(default=())
+
+
+def test_compile_scalar_unions():
+    for resolve_unions_by_shape in False, True:
+        r = Registry(resolve_unions_by_shape=resolve_unions_by_shape)
+        r.compile(Scalars)
+        data = {'number': 1.5, 'either': 'x', 'maybe': 1, 'many': [1, 'a']}
+        assert r.unmarshal(data, Scalars) == Scalars(1.5, 'x', 1, [1, 'a'])
+        with assert_raises(UnmarshalError):
+            r.unmarshal({'number': {}, 'either': 1}, Scalars)
+
+
+def test_compile_freeze():
+    r = Registry()
+    r.compile(Server, List[int], freeze=True)
+    assert r.unmarshal(DATA, Server).id == 1
+
+    with assert_raises(RuntimeError):
+        r.add_marshal_hook(Net, lambda n: n.ip)
+
+    with assert_raises(RuntimeError):
+        r.add_unmarshal_hook(Net, lambda n: Net(n))
+
+    with assert_raises(RuntimeError):
+        r.add_tagged_union(Union[Net, Server], 'type', {'n': Net, 's': Server})
+
+    for method in r.clear_cache, r.enable_profiling, r.disable_profiling:
+        with assert_raises(RuntimeError):
+            method()
+    assert r.cache_info()['marshal'].size > 0
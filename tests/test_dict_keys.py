@@ -1,8 +1,8 @@
-from enum import Enum
+from enum import Enum, Flag, IntEnum
 from pytest import raises as assert_raises
 from typing import Any, Dict, Union
 
-from fieldmarshal import MarshalError, UnmarshalError, marshal, unmarshal
+from fieldmarshal import MarshalError, Registry, UnmarshalError, marshal, unmarshal
 
 
 class MyEnum(Enum):
@@ -31,3 +31,42 @@ def test_bool_none():
     with assert_raises(UnmarshalError):
         unmarshal({'x': 1}, Dict[type(None), int])
 
+
+
+class MyIntEnum(IntEnum):
+    ONE = 1
+    UNO = 1
+
+
+class MyFlag(Flag):
+    R = 1
+    W = 2
+
+
+def test_enum_keys():
+    assert unmarshal({'a': 1}, Dict[MyEnum, int]) == {MyEnum.A: 1}
+    assert unmarshal({'1': 1}, Dict[MyIntEnum, int]) == {MyIntEnum.ONE: 1}
+    assert unmarshal({'1': 1, '3': 3}, Dict[MyFlag, int]) == \
+        {MyFlag.R: 1, MyFlag.R | MyFlag.W: 3}
+
+    with assert_raises(UnmarshalError):
+        unmarshal({'b': 1}, Dict[MyEnum, int])
+    with assert_raises(UnmarshalError):
+        unmarshal({'2': 1}, Dict[MyIntEnum, int])
+
+
+def test_number_keys():
+    assert unmarshal({'1': 'a', '-2': 'b'}, Dict[int, str]) == {1: 'a', -2: 'b'}
+    assert unmarshal({'1.5': 'a'}, Dict[float, str]) == {1.5: 'a'}
+    assert unmarshal({'1': 'a'}, Dict[int, str], trusted=True) == {1: 'a'}
+
+    with assert_raises(ValueError):
+        unmarshal({'a': 1}, Dict[int, int])
+
+
+def test_key_hooks():
+    r = Registry()
+    r.add_unmarshal_hook(int, lambda i: i * 10)
+    r.add_unmarshal_hook(MyEnum, lambda s: MyEnum.A)
+    assert r.unmarshal({'1': 1}, Dict[int, Any]) == {10: 1}
+    assert r.unmarshal({'x': 1}, Dict[MyEnum, Any]) == {MyEnum.A: 1}
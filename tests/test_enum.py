@@ -1,7 +1,8 @@
 from enum import Enum, IntEnum, Flag, IntFlag, auto
 from typing import Dict
 
-from fieldmarshal import Registry, marshal, unmarshal
+from pytest import raises as assert_raises
+from fieldmarshal import Registry, UnmarshalError, field, marshal, struct, unmarshal
 
 
 class MyStrEnum(Enum):
@@ -56,6 +57,50 @@ def test_unmarshal_enum():
     assert unmarshal(1, MyIntFlag) is MyIntFlag.A
 
 
+class MyAliasEnum(Enum):
+    A = 'a'
+    ALIAS = 'a'
+
+    @classmethod
+    def _missing_(cls, value):
+        if value == 'legacy':
+            return cls.A
+
+
+@struct
+class WithEnums:
+    str_enum: MyStrEnum
+    int_enum: MyIntEnum = field(name='int')
+    flag: MyFlag = MyFlag.A
+
+
+def test_unmarshal_enum_lookup():
+    assert unmarshal('a', MyAliasEnum) is MyAliasEnum.A
+    assert unmarshal('legacy', MyAliasEnum) is MyAliasEnum.A
+    assert unmarshal(MyFlag.A.value | MyFlag.B.value, MyFlag) is MyFlag.AB
+    assert unmarshal(0, MyFlag) == MyFlag(0)
+
+
+def test_unmarshal_enum_unknown():
+    with assert_raises(UnmarshalError, match="Unknown value for MyStrEnum: 'b'"):
+        unmarshal('b', MyStrEnum)
+    with assert_raises(UnmarshalError, match='Unknown value for MyIntEnum: 2'):
+        unmarshal(2, MyIntEnum)
+    with assert_raises(UnmarshalError):
+        unmarshal('1', MyIntEnum)
+
+
+def test_enum_fields():
+    obj = WithEnums(MyStrEnum.A, MyIntEnum.A, MyFlag.A | MyFlag.B)
+    data = {'str_enum': 'a', 'int': 1, 'flag': 3}
+    assert marshal(obj) == data
+    assert unmarshal(data, WithEnums) == obj
+
+    r = Registry()
+    r.add_marshal_hook(MyStrEnum, lambda e: e.name)
+    assert r.marshal(obj)['str_enum'] == 'A'
+
+
 def test_marshal_enum_dict_keys():
     assert marshal({MyStrEnum.A: 1}) == {'a': 1}
     assert marshal({MyBoolEnum.A: 1}) == {'true': 1}
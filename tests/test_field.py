@@ -63,3 +63,25 @@ def test_field_hooks_override_registry_hooks():
 
     assert r.marshal(Foo(MyString('x'))) == {'a': '<x>'}
     assert r.unmarshal({'a': '<x>'}, Foo) == Foo('x')
+
+
+def test_missing_default_factory():
+    @attr.s
+    class Foo:
+        a = attr.ib(default=attr.Factory(list))
+        b = field(omit=True, default=attr.Factory(lambda self: len(self.a), takes_self=True))
+        c = attr.ib(default=attr.Factory(lambda self: self.b + 1, takes_self=True))
+
+    assert unmarshal({}, Foo) == Foo([], 0, 1)
+    assert unmarshal({'a': [1, 2], 'c': 5}, Foo) == Foo([1, 2], 2, 5)
+    assert unmarshal({}, Foo).a is not unmarshal({}, Foo).a
+
+
+def test_private_attribute():
+    @attr.s
+    class Foo:
+        _a = attr.ib()
+        _b = field('b', default=2)
+
+    assert unmarshal({'_a': 1}, Foo) == Foo(1, 2)
+    assert unmarshal({'_a': 1, 'b': 3}, Foo) == Foo(1, 3)
@@ -1,4 +1,16 @@
-from fieldmarshal import marshal_json, unmarshal_json
+import io
+import mmap
+from decimal import Decimal
+from functools import wraps
+from enum import Enum
+from typing import List, Optional, Set
+
+import pytest
+from pytest import raises as assert_raises
+from fieldmarshal import (
+    Hook, JsonBackend, Registry, dump, field, get_json_backend, iter_marshal_json,
+    marshal_json, struct, unmarshal_json,
+)
 
 
 def test_json():
@@ -6,3 +18,110 @@ def test_json():
     s = marshal_json(d)
     assert s == '{"a": 1, "b": 2, "c": 3, "d": 4, "e": 5}'
     assert unmarshal_json(s, dict) == d
+
+
+@pytest.mark.parametrize('name', ['json', 'orjson', 'ujson', 'rapidjson'])
+def test_json_backends(name):
+    if name != 'json':
+        pytest.importorskip(name)
+    r = Registry(json_backend=name)
+    assert r.json_backend.name == name
+
+    d = {2: 'a/b', True: [1.5, None], 'ü': False}
+    s = r.marshal_json(d)
+    assert r.unmarshal_json(s, dict) == {'2': 'a/b', 'true': [1.5, None], 'ü': False}
+    if isinstance(s, bytes):
+        s = s.decode('utf-8')
+    assert r.unmarshal_json(s.encode('utf-8'), dict) == r.unmarshal_json(s, dict)
+
+
+def test_json_backend_auto():
+    assert get_json_backend('auto').name in {'json', 'orjson', 'ujson', 'rapidjson'}
+
+
+def test_json_backend_custom():
+    backend = JsonBackend('custom', lambda obj: repr(obj), lambda s: {'a': 1})
+    r = Registry(json_backend=backend)
+    assert r.marshal_json({'a': 1}) == "{'a': 1}"
+    assert r.unmarshal_json('', dict) == {'a': 1}
+
+
+def test_json_backend_unknown():
+    with assert_raises(ValueError):
+        Registry(json_backend='foo')
+
+
+class Color(Enum):
+    RED = 'red'
+
+
+@struct
+class Item:
+    id: int
+    name: str = field('Name')
+    color: Color = Color.RED
+    tags: Set[str] = field(default=frozenset(), omit_if_none=True)
+    parent: Optional['Item'] = field(default=None, omit_if_none=True)
+    secret: str = field(default='', omit=True)
+    label: str = field(default='x', marshal=lambda s: '<%s>' % s)
+
+
+@pytest.mark.parametrize('obj', [
+    None, 1, 1.5, float('nan'), 'ü"', [], {}, (1, 2),
+    {1: [True, None], 'a': {}},
+    Item(1, 'a'),
+    [Item(1, 'a', tags={'b', 'a'}, parent=Item(2, 'b', tags=None))],
+    {'items': [Item(i, str(i)) for i in range(10)]},
+])
+def test_iter_marshal_json(obj):
+    expected = marshal_json(obj)
+    assert ''.join(iter_marshal_json(obj)) == expected
+    assert ''.join(iter_marshal_json(obj, chunk_size=1)) == expected
+
+
+def test_dump():
+    items = [Item(i, str(i)) for i in range(1000)]
+    fp = io.StringIO()
+    dump(items, fp, chunk_size=100)
+    assert fp.getvalue() == marshal_json(items)
+    assert len(list(iter_marshal_json(items, chunk_size=100))) > 100
+
+
+def test_iter_marshal_json_decorated_hook():
+    def upper(fn):
+        @wraps(fn)
+        def wrapper(obj, registry):
+            return fn(obj, registry).upper()
+        return wrapper
+
+    r = Registry()
+    r.add_marshal_hook(Decimal, Hook(upper(lambda d, registry: 'eur %s' % d), True))
+    assert r.marshal_json([Decimal(1)]) == '["EUR 1"]'
+    assert ''.join(r.iter_marshal_json([Decimal(1)])) == '["EUR 1"]'
+    r.enable_profiling()
+    assert ''.join(r.iter_marshal_json([Decimal(1)])) == '["EUR 1"]'
+
+
+@pytest.mark.parametrize('name', ['json', 'orjson'])
+def test_unmarshal_json_binary(name, tmp_path):
+    if name != 'json':
+        pytest.importorskip(name)
+    r = Registry(json_backend=name)
+    data = '[{"id": 1, "Name": "ü", "color": "red"}]'
+    expected = [Item(1, 'ü')]
+    encoded = data.encode('utf-8')
+    assert r.unmarshal_json(encoded, List[Item]) == expected
+    assert r.unmarshal_json(bytearray(encoded), List[Item]) == expected
+    assert r.unmarshal_json(memoryview(encoded), List[Item]) == expected
+
+    path = tmp_path / 'data.json'
+    path.write_bytes(encoded)
+    assert r.unmarshal_json(path, List[Item]) == expected
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            assert r.unmarshal_json(m, List[Item]) == expected
+
+    empty = tmp_path / 'empty.json'
+    empty.write_bytes(b'')
+    with assert_raises(ValueError):
+        r.unmarshal_json(empty, List[Item])
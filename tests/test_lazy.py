@@ -0,0 +1,104 @@
+import pickle
+from enum import Enum
+from typing import Dict, List, Optional
+
+import attr
+import pytest
+from pytest import raises as assert_raises
+from fieldmarshal import UnmarshalError, field, marshal, struct, unmarshal
+
+
+class Status(Enum):
+    ON = 'on'
+
+
+@struct
+class Net:
+    ip: str
+
+
+@struct
+class Server:
+    id: int
+    status: Status
+    net: Net = field('public_net')
+    ips: List[Net]
+    labels: Dict[str, str] = attr.Factory(dict)
+    backup: Optional[Net] = None
+
+
+@attr.s(frozen=True)
+class FrozenServer:
+    id = attr.ib()
+    net: Net = attr.ib()
+
+
+DATA = {
+    'id': 1,
+    'status': 'on',
+    'public_net': {'ip': '1.2.3.4'},
+    'ips': [{'ip': '1.1.1.1'}],
+}
+
+
+def test_unmarshal_lazy():
+    server = unmarshal(DATA, Server, lazy=True)
+    assert isinstance(server, Server)
+    assert server.id == 1
+    assert server.status is Status.ON
+    assert server.labels == {}
+    assert server.backup is None
+    assert server.net == Net('1.2.3.4')
+    assert server.net is server.net
+    assert server.ips == [Net('1.1.1.1')]
+    assert server == unmarshal(DATA, Server)
+    assert unmarshal(DATA, Server) == server
+    assert repr(server) == repr(unmarshal(DATA, Server))
+    assert marshal(server) == marshal(unmarshal(DATA, Server))
+
+
+def test_unmarshal_lazy_error_on_access():
+    server = unmarshal(dict(DATA, ips=[{'ip': 1}]), Server, lazy=True)
+    assert server.id == 1
+    with assert_raises(UnmarshalError):
+        server.ips
+
+    with assert_raises(UnmarshalError, match='missing key'):
+        unmarshal({'id': 1}, Server, lazy=True)
+
+
+def test_unmarshal_lazy_assign():
+    server = unmarshal(DATA, Server, lazy=True)
+    server.net = Net('x')
+    assert server.net == Net('x')
+
+
+def test_unmarshal_lazy_frozen_dict_class():
+    server = unmarshal({'id': 1, 'net': {'ip': 'x'}}, FrozenServer, lazy=True)
+    assert server.net == Net('x')
+    assert server == FrozenServer(1, Net('x'))
+    assert type(server).__hash__ is FrozenServer.__hash__
+    with assert_raises(attr.exceptions.FrozenInstanceError):
+        server.net = Net('y')
+
+
+def test_unmarshal_lazy_pickle():
+    server = pickle.loads(pickle.dumps(unmarshal(DATA, Server, lazy=True)))
+    assert type(server) is Server
+    assert server == unmarshal(DATA, Server)
+    assert type(server.net) is Net
+
+    data = {'id': 1, 'net': {'ip': 'x'}}
+    servers = pickle.loads(pickle.dumps(unmarshal([data], List[FrozenServer], lazy=True)))
+    assert type(servers[0]) is FrozenServer
+    assert servers == [FrozenServer(1, Net('x'))]
+
+
+@pytest.mark.parametrize('data, type_hint, result', [
+    (None, Optional[Net], None),
+    ({'ip': 'x'}, Optional[Net], Net('x')),
+    ([{'ip': 'x'}], List[Net], [Net('x')]),
+    (1, int, 1),
+])
+def test_unmarshal_lazy_other_types(data, type_hint, result):
+    assert unmarshal(data, type_hint, lazy=True) == result
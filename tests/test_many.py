@@ -0,0 +1,51 @@
+from enum import Enum
+from typing import List, Optional
+
+import pytest
+from pytest import raises as assert_raises
+from fieldmarshal import Registry, struct, marshal_many, unmarshal_many
+
+
+class Color(Enum):
+    RED = 'red'
+
+
+@struct
+class Foo:
+    id: int
+    color: Color
+
+
+FOOS = [Foo(i, Color.RED) for i in range(10)]
+DATA = [{'id': i, 'color': 'red'} for i in range(10)]
+
+
+@pytest.mark.parametrize('generator', [False, True])
+def test_marshal_many(generator):
+    result = marshal_many(FOOS, generator=generator)
+    assert isinstance(result, list) is not generator
+    assert list(result) == DATA
+    assert list(marshal_many(iter(FOOS), generator=generator)) == DATA
+    assert list(marshal_many([1, 'a', Color.RED, None], generator=generator)) == [1, 'a', 'red', None]
+    assert list(marshal_many([], generator=generator)) == []
+
+
+@pytest.mark.parametrize('generator', [False, True])
+def test_unmarshal_many(generator):
+    result = unmarshal_many(DATA, Foo, generator=generator)
+    assert isinstance(result, list) is not generator
+    assert list(result) == FOOS
+    assert list(unmarshal_many(iter(DATA), Foo, generator=generator)) == FOOS
+    assert list(unmarshal_many([1, None], Optional[int], generator=generator)) == [1, None]
+    assert list(unmarshal_many([[1], []], List[int], generator=generator)) == [[1], []]
+
+    with assert_raises(TypeError):
+        list(unmarshal_many([1, 'a'], int, generator=generator))
+
+
+def test_marshal_many_hooks():
+    r = Registry()
+    r.add_marshal_hook(int, lambda i: str(i))
+    r.add_unmarshal_hook(int, lambda s: int(s))
+    assert r.marshal_many([1, 2]) == ['1', '2']
+    assert r.unmarshal_many(['1', '2'], int) == [1, 2]
@@ -2,7 +2,7 @@ from typing import List
 
 import attr
 import pytest
-from fieldmarshal import Registry, struct, marshal
+from fieldmarshal import Registry, field, struct, marshal
 from pytest import raises as assert_raises
 
 
@@ -77,3 +77,67 @@ def test_marshal_class():
     r = Registry()
     r.add_marshal_hook(Foo, lambda f: {'value': f.value})
     assert r.marshal(Foo(1)) == {'value': 1}
+
+
+def test_marshal_struct_hook_added_later():
+    @struct
+    class Foo:
+        value: int
+        name: str = 'x'
+
+    r = Registry()
+    assert r.marshal(Foo(1)) == {'value': 1, 'name': 'x'}
+
+    r.add_marshal_hook(int, lambda i: str(i))
+    assert r.marshal(Foo(1)) == {'value': '1', 'name': 'x'}
+
+
+def test_marshal_struct_private_attribute():
+    @attr.s
+    class Foo:
+        _value = attr.ib()
+
+    assert marshal(Foo(1)) == {'_value': 1}
+
+
+@struct(frozen=True)
+class Tag:
+    name: str
+    priority: int
+
+
+def test_marshal_set_order():
+    tags = {Tag('b', 1), Tag('a', 2)}
+    r = Registry(set_order=lambda tag: tag.priority)
+    assert r.marshal(tags) == [{'name': 'b', 'priority': 1}, {'name': 'a', 'priority': 2}]
+
+    r = Registry(set_order='iteration')
+    assert r.marshal(tags) == [marshal(tag) for tag in tags]
+    assert sorted(r.marshal({1, 'a', None}), key=str) == [1, None, 'a']
+    assert ''.join(r.iter_marshal_json({2, 1})) == r.marshal_json({2, 1})
+
+    with assert_raises(TypeError):
+        marshal({1, 'a'})
+    with assert_raises(ValueError):
+        Registry(set_order='random')
+
+
+def test_marshal_set_order_field():
+    @struct
+    class Tagged:
+        tags: frozenset = field(set_order=lambda tag: tag.name)
+        ids: set = field(default=frozenset({3, 1, 2}), set_order='sorted')
+        names: list = field(default=('x',), set_order='iteration')
+
+    obj = Tagged(frozenset({Tag('b', 1), Tag('a', 2)}))
+    data = {
+        'tags': [{'name': 'a', 'priority': 2}, {'name': 'b', 'priority': 1}],
+        'ids': [1, 2, 3],
+        'names': ['x'],
+    }
+    r = Registry(set_order='iteration')
+    assert r.marshal(obj) == data
+    assert ''.join(r.iter_marshal_json(obj)) == r.marshal_json(obj)
+
+    with assert_raises(ValueError):
+        field(set_order='random')
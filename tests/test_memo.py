@@ -0,0 +1,92 @@
+import io
+import pickle
+from typing import List
+
+from pytest import raises as assert_raises
+from fieldmarshal import Registry, struct
+
+
+@struct(frozen=True)
+class Datacenter:
+    name: str
+    location: str
+
+
+@struct
+class Server:
+    id: int
+    datacenter: Datacenter
+
+
+DC = Datacenter('fsn1', 'Falkenstein')
+SERVERS = [Server(i, DC) for i in range(10)]
+
+
+def test_memo_marshal():
+    r = Registry(memo_size=10)
+    data = r.marshal(SERVERS)
+    assert data == Registry().marshal(SERVERS)
+    assert data[0]['datacenter'] is data[9]['datacenter']
+    info = r.cache_info()['memo']
+    assert info.misses == 1
+    assert info.size == 1
+
+
+def test_memo_not_frozen():
+    r = Registry(memo_size=10)
+    server = SERVERS[0]
+    assert r.marshal(server) is not r.marshal(server)
+    assert r.cache_info()['memo'].size == 1  # DC
+
+
+def test_memo_disabled():
+    r = Registry()
+    data = r.marshal(SERVERS)
+    assert data[0]['datacenter'] is not data[1]['datacenter']
+    assert 'memo' not in r.cache_info()
+
+
+def test_memo_bounded():
+    r = Registry(memo_size=2)
+    dcs = [Datacenter(str(i), 'x') for i in range(5)]
+    assert r.marshal(dcs) == [{'name': str(i), 'location': 'x'} for i in range(5)]
+    info = r.cache_info()['memo']
+    assert info.size == 2
+    assert info.evictions == 3
+
+
+def test_memo_json():
+    r = Registry(memo_size=10)
+    text = ''.join(r.iter_marshal_json(SERVERS))
+    assert text == Registry().marshal_json(SERVERS)
+    info = r.cache_info()['json_memo']
+    assert info.misses == 1
+    assert info.size == 1
+
+    fp = io.StringIO()
+    r.dump(SERVERS, fp)
+    assert fp.getvalue() == text
+    assert r.marshal_json(SERVERS) == text
+
+
+def test_memo_hooks():
+    r = Registry(memo_size=10)
+    assert r.marshal(DC) == {'name': 'fsn1', 'location': 'Falkenstein'}
+    r.add_marshal_hook(str, lambda s: s.upper())
+    assert r.marshal(DC) == {'name': 'FSN1', 'location': 'FALKENSTEIN'}
+    assert ''.join(r.iter_marshal_json(DC)) == '{"name": "FSN1", "location": "FALKENSTEIN"}'
+
+
+def test_memo_unmarshal_roundtrip():
+    r = Registry(memo_size=10)
+    assert r.unmarshal(r.marshal(SERVERS), List[Server]) == SERVERS
+
+
+def test_memo_size_invalid():
+    with assert_raises(ValueError):
+        Registry(memo_size=0)
+
+
+def test_memo_pickle():
+    r = pickle.loads(pickle.dumps(Registry(memo_size=5)))
+    assert r.cache_info()['memo'].maxsize == 5
@@ -0,0 +1,79 @@
+import json
+import pickle
+from datetime import date
+from typing import List
+
+import pytest
+from pytest import raises as assert_raises
+from fieldmarshal import (
+    JsonBackend, Registry, UnmarshalError, field, struct, unmarshal_json_parallel,
+)
+
+
+def parse_date(s):
+    return date.fromisoformat(s)
+
+
+def strip_brackets(s):
+    return s.strip('<>')
+
+
+@struct
+class Foo:
+    id: int
+    day: date
+    name: str = field(default='', unmarshal=strip_brackets)
+
+
+DATA = json.dumps([
+    {'id': i, 'day': '2020-01-%02d' % (i % 28 + 1), 'name': '<%d>' % i}
+    for i in range(100)
+])
+
+
+def test_pickle_registry():
+    r = Registry(json_backend='json')
+    r.add_unmarshal_hook(date, parse_date)
+    r2 = pickle.loads(pickle.dumps(r))
+    assert r2.json_backend.name == 'json'
+    assert r2.unmarshal('2020-01-01', date) == date(2020, 1, 1)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_unmarshal_json_parallel(workers):
+    r = Registry()
+    r.add_unmarshal_hook(date, parse_date)
+    result = r.unmarshal_json_parallel(DATA, List[Foo], workers=workers)
+    assert result == r.unmarshal_json(DATA, List[Foo])
+    assert result[3] == Foo(3, date(2020, 1, 4), '3')
+
+
+def test_unmarshal_json_parallel_error_index():
+    r = Registry()
+    r.add_unmarshal_hook(date, parse_date)
+    data = json.loads(DATA)
+    data[57]['id'] = 'x'
+    with assert_raises(UnmarshalError, match='element 57'):
+        r.unmarshal_json_parallel(json.dumps(data), List[Foo], workers=2)
+
+
+@pytest.mark.parametrize('registry', [
+    lambda: Registry(set_order=lambda value: value),
+    lambda: Registry(json_backend=JsonBackend('custom', json.dumps, lambda s: json.loads(s))),
+])
+def test_unmarshal_json_parallel_unpicklable(registry):
+    r = registry()
+    r.add_unmarshal_hook(date, parse_date)
+    with assert_raises(pickle.PicklingError, match='must be picklable'):
+        r.unmarshal_json_parallel(DATA, List[Foo], workers=2)
+    assert r.unmarshal_json_parallel(DATA, List[Foo], workers=1)[3].id == 3
+
+
+def test_unmarshal_json_parallel_invalid():
+    with assert_raises(UnmarshalError):
+        unmarshal_json_parallel('{}', List[int])
+
+    with assert_raises(UnmarshalError):
+        unmarshal_json_parallel('[]', int)
+
+    assert unmarshal_json_parallel('[]', List[int], workers=2) == []
@@ -0,0 +1,147 @@
+from enum import Enum
+from typing import Dict, List, Optional
+
+import attr
+import pytest
+from pytest import raises as assert_raises
+from fieldmarshal import (
+    Registry, UnmarshalError, apply_patch, field, marshal, marshal_diff, struct,
+)
+
+
+class Status(Enum):
+    ON = 'on'
+    OFF = 'off'
+
+
+@struct(frozen=True)
+class Datacenter:
+    name: str
+    location: str
+
+
+@struct
+class Net:
+    ip: str
+    dns: Optional[str] = field(default=None, omit_if_none=True)
+
+
+@struct
+class Server:
+    id: int
+    name: str = field('Name')
+    status: Status = Status.ON
+    datacenter: Optional[Datacenter] = None
+    nets: Dict[int, Net] = attr.Factory(dict)
+    tags: List[str] = attr.Factory(list)
+    note: str = field(default='', marshal=str.upper, unmarshal=str.lower)
+
+
+DC = Datacenter('fsn1', 'Falkenstein')
+SERVER = Server(1, 'web', Status.ON, DC, {4: Net('1.2.3.4')}, ['a', 'b'], 'x')
+
+
+@pytest.mark.parametrize('new, merge_patch, json_patch', [
+    (SERVER, {}, []),
+    (attr.evolve(SERVER, name='db'), {'Name': 'db'},
+     [{'op': 'replace', 'path': '/Name', 'value': 'db'}]),
+    (attr.evolve(SERVER, status=Status.OFF), {'status': 'off'},
+     [{'op': 'replace', 'path': '/status', 'value': 'off'}]),
+    (attr.evolve(SERVER, datacenter=Datacenter('nbg1', 'Falkenstein')),
+     {'datacenter': {'name': 'nbg1'}},
+     [{'op': 'replace', 'path': '/datacenter/name', 'value': 'nbg1'}]),
+    (attr.evolve(SERVER, nets={4: Net('1.2.3.4', 'dns'), 6: Net('::1')}),
+     {'nets': {'4': {'dns': 'dns'}, '6': {'ip': '::1'}}},
+     [{'op': 'add', 'path': '/nets/4/dns', 'value': 'dns'},
+      {'op': 'add', 'path': '/nets/6', 'value': {'ip': '::1'}}]),
+    (attr.evolve(SERVER, nets={}), {'nets': {'4': None}},
+     [{'op': 'remove', 'path': '/nets/4'}]),
+    (attr.evolve(SERVER, tags=['a']), {'tags': ['a']},
+     [{'op': 'replace', 'path': '/tags', 'value': ['a']}]),
+    (attr.evolve(SERVER, note='y'), {'note': 'Y'},
+     [{'op': 'replace', 'path': '/note', 'value': 'Y'}]),
+])
+def test_diff_and_apply(new, merge_patch, json_patch):
+    assert marshal_diff(SERVER, new) == json_patch
+    assert marshal_diff(SERVER, new, format='merge-patch') == merge_patch
+    assert apply_patch(SERVER, json_patch) == new
+    assert apply_patch(SERVER, merge_patch, format='merge-patch') == new
+
+
+def test_diff_skips_identical_subobjects():
+    calls = []
+    r = Registry()
+    r.add_marshal_hook(Datacenter, lambda dc: calls.append(dc) or dc.name)
+    assert r.marshal_diff(SERVER, attr.evolve(SERVER, id=2), format='merge-patch') == {'id': 2}
+    assert calls == []
+
+
+def test_diff_none():
+    new = attr.evolve(SERVER, datacenter=None)
+    assert marshal_diff(SERVER, new) == \
+        [{'op': 'replace', 'path': '/datacenter', 'value': None}]
+    assert marshal_diff(SERVER, new, format='merge-patch') == {'datacenter': None}
+    assert apply_patch(SERVER, marshal_diff(SERVER, new)) == new
+    # With a merge patch, the key is removed and the default is used.
+    patch = marshal_diff(SERVER, new, format='merge-patch')
+    assert apply_patch(SERVER, patch, format='merge-patch') == new
+
+
+@struct
+class Inner:
+    a: Optional[int]
+
+
+@struct
+class Outer:
+    inner: Optional[Inner] = None
+
+
+def test_diff_none_in_added_value():
+    old, new = Outer(), Outer(Inner(None))
+    assert marshal_diff(old, new) == [{'op': 'replace', 'path': '/inner', 'value': {'a': None}}]
+    assert apply_patch(old, marshal_diff(old, new)) == new
+    # A merge patch can't set None, so the added value is incomplete.
+    with assert_raises(UnmarshalError, match="missing key: 'a'"):
+        apply_patch(old, marshal_diff(old, new, format='merge-patch'), format='merge-patch')
+
+
+def test_diff_other_types():
+    assert marshal_diff(1, 2, format='merge-patch') == 2
+    assert marshal_diff(1, 1.0) == [{'op': 'replace', 'path': '', 'value': 1.0}]
+    assert marshal_diff({'a/b': 1}, {'a/b': 2}) == \
+        [{'op': 'replace', 'path': '/a~1b', 'value': 2}]
+    assert marshal_diff(SERVER, DC, format='merge-patch') == {
+        'id': None, 'Name': None, 'status': None, 'datacenter': None, 'nets': None,
+        'tags': None, 'note': None, 'name': 'fsn1', 'location': 'Falkenstein',
+    }
+
+
+def test_apply_patch_shares_unchanged():
+    new = apply_patch(SERVER, [{'op': 'replace', 'path': '/Name', 'value': 'db'}])
+    assert new.name == 'db'
+    assert new.datacenter is SERVER.datacenter
+    assert new.nets is SERVER.nets
+    assert SERVER.name == 'web'
+
+    new = apply_patch(SERVER, {'nets': {'6': {'ip': '::1'}}}, format='merge-patch')
+    assert new.nets[4] is SERVER.nets[4]
+    assert new.nets[6] == Net('::1')
+
+
+def test_apply_patch_errors():
+    with assert_raises(UnmarshalError, match="missing key: 'id'"):
+        apply_patch(SERVER, [{'op': 'remove', 'path': '/id'}])
+    with assert_raises(UnmarshalError):
+        apply_patch(SERVER, {'status': 'unknown'}, format='merge-patch')
+    with assert_raises(ValueError):
+        apply_patch(SERVER, [{'op': 'move', 'from': '/id', 'path': '/x'}])
+    with assert_raises(ValueError):
+        marshal_diff(SERVER, SERVER, format='diff')
+
+
+def test_apply_patch_type_hint():
+    assert apply_patch([1], [2, 3], List[int], format='merge-patch') == [2, 3]
+    assert apply_patch({'a': 1}, [{'op': 'add', 'path': '/b', 'value': 2}]) == {'a': 1, 'b': 2}
+    assert apply_patch(None, {'name': 'x', 'location': 'y'}, Optional[Datacenter],
+                       format='merge-patch') == Datacenter('x', 'y')
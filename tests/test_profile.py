@@ -0,0 +1,131 @@
+import time
+from typing import List
+
+from fieldmarshal import Hook, Registry, field, struct
+
+
+@struct
+class Point:
+    x: int
+    y: int
+
+
+@struct
+class Path:
+    points: List[Point]
+
+
+class Color:
+    def __init__(self, name):
+        self.name = name
+
+
+def entries(r):
+    return {(e.operation, e.type_): e for e in r.profile_snapshot()}
+
+
+def test_profile_disabled():
+    r = Registry()
+    r.marshal(Path([Point(1, 2)]))
+    assert r.profile_snapshot() == []
+    assert not hasattr(r._marshal_impl_cache[Path], '__wrapped__')
+
+
+def test_profile_marshal():
+    r = Registry()
+    r.marshal(Point(1, 2))
+    r.enable_profiling()
+    assert r.marshal(Path([Point(1, 2), Point(3, 4)])) == \
+        {'points': [{'x': 1, 'y': 2}, {'x': 3, 'y': 4}]}
+    stats = entries(r)
+    assert set(stats) == {('marshal', Path), ('marshal', list), ('marshal', Point)}
+    assert stats['marshal', Point].calls == 2
+    assert stats['marshal', list].items == 2
+    path = stats['marshal', Path]
+    assert path.calls == 1
+    assert not path.hook
+    assert path.total_time >= path.self_time >= 0
+    assert path.total_time >= stats['marshal', list].total_time
+
+
+def test_profile_unmarshal():
+    r = Registry()
+    r.enable_profiling()
+    data = {'points': [{'x': 1, 'y': 2}]}
+    assert r.unmarshal(data, Path) == Path([Point(1, 2)])
+    assert r.unmarshal_many([data, data], Path) == [Path([Point(1, 2)])] * 2
+    stats = entries(r)
+    assert stats['unmarshal', Path].calls == 3
+    assert stats['unmarshal', Path].items == 3
+    assert stats['unmarshal', Point].calls == 3
+    assert stats['unmarshal', List[Point]].calls == 3
+
+
+def test_profile_hooks():
+    r = Registry()
+    r.add_marshal_hook(Color, lambda c: c.name)
+    r.add_unmarshal_hook(Color, Hook(lambda s, _, __: Color(s), True))
+    r.enable_profiling()
+    r.marshal([Color('red')])
+    r.unmarshal('red', Color)
+    stats = entries(r)
+    assert stats['marshal', Color].hook
+    assert stats['marshal', Color].calls == 1
+    assert stats['unmarshal', Color].hook
+    assert stats['unmarshal', Color].items == 3
+    assert not stats['marshal', list].hook
+
+
+def slow_upper(s):
+    time.sleep(0.01)
+    return s.upper()
+
+
+@struct
+class Label:
+    id: int
+    text: str = field(marshal=slow_upper, unmarshal=str.lower)
+
+
+def test_profile_field_hooks():
+    r = Registry()
+    r.enable_profiling()
+    assert r.marshal(Label(1, 'a')) == {'id': 1, 'text': 'A'}
+    assert r.unmarshal({'id': 1, 'text': 'A'}, Label) == Label(1, 'a')
+    stats = {(e.operation, e.type_, e.field): e for e in r.profile_snapshot()}
+    hook = stats['marshal', Label, 'text']
+    assert hook.hook
+    assert hook.calls == 1
+    assert hook.items == 1
+    assert hook.self_time >= 0.01
+    assert stats['marshal', Label, None].self_time < 0.01
+    assert stats['unmarshal', Label, 'text'].calls == 1
+    assert ('marshal', Label, 'id') not in stats
+
+    r.disable_profiling()
+    assert r.marshal(Label(1, 'a')) == {'id': 1, 'text': 'A'}
+    assert r.profile_snapshot() == []
+
+
+def test_profile_reset():
+    r = Registry()
+    r.enable_profiling()
+    r.marshal(Point(1, 2))
+    snapshot = r.profile_snapshot(reset=True)
+    assert snapshot[0].calls == 1
+    assert r.profile_snapshot()[0].calls == 0
+    r.marshal(Point(1, 2))
+    assert r.profile_snapshot()[0].calls == 1
+    assert snapshot[0].calls == 1
+
+    r.disable_profiling()
+    assert r.profile_snapshot() == []
+    assert r.marshal(Point(1, 2)) == {'x': 1, 'y': 2}
+    assert not hasattr(r._marshal_impl_cache[Point], '__wrapped__')
+
+
+def test_profile_stream():
+    r = Registry()
+    r.enable_profiling()
+    obj = Path([Point(1, 2)])
+    assert ''.join(r.iter_marshal_json(obj)) == r.marshal_json(obj)
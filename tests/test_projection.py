@@ -0,0 +1,105 @@
+from typing import Dict, List, Optional, Union
+
+import pytest
+from pytest import raises as assert_raises
+from fieldmarshal import UnmarshalError, field, struct, unmarshal, unmarshal_json
+
+
+@struct
+class IPAddress:
+    ip: str
+    dns_ptr: str
+
+
+@struct
+class PublicNet:
+    ipv4: IPAddress
+    ipv6: Optional[IPAddress] = None
+
+
+@struct
+class Server:
+    id: int
+    name: str
+    public_net: PublicNet = field('net')
+    history: List[PublicNet] = field(default=())
+    labels: Dict[str, str] = field(default=None)
+
+
+DATA = {
+    'id': 1,
+    'name': 'x',
+    'net': {'ipv4': {'ip': '1.2.3.4', 'dns_ptr': 'a'}},
+    'history': [{'ipv4': {'ip': '4.3.2.1', 'dns_ptr': 'b'}}],
+    'labels': {'a': 'b'},
+}
+
+
+def test_unmarshal_projection():
+    server = unmarshal(DATA, Server, fields={'id', 'public_net.ipv4.ip'})
+    assert server.id == 1
+    assert server.public_net.ipv4.ip == '1.2.3.4'
+    assert server.public_net.ipv6 is None
+    assert server.history == ()
+    assert server.labels is None
+
+    with assert_raises(AttributeError):
+        server.name
+
+    with assert_raises(AttributeError):
+        server.public_net.ipv4.dns_ptr
+
+
+def test_unmarshal_projection_subtree():
+    server = unmarshal(DATA, Server, fields={'public_net', 'public_net.ipv4.ip', 'labels'})
+    assert server.public_net == PublicNet(IPAddress('1.2.3.4', 'a'))
+    assert server.labels == {'a': 'b'}
+
+
+def test_unmarshal_projection_containers():
+    servers = unmarshal_json(
+        '[{"id": 1, "history": [{"ipv4": {"ip": "a", "dns_ptr": "b"}}]}]',
+        List[Server],
+        fields={'history.ipv4.ip'},
+    )
+    assert servers[0].history[0].ipv4.ip == 'a'
+    assert isinstance(servers[0].history, list)
+
+
+def test_unmarshal_projection_errors():
+    with assert_raises(UnmarshalError, match='missing key'):
+        unmarshal({'name': 'x'}, Server, fields={'id'})
+
+    with assert_raises(UnmarshalError):
+        unmarshal({'id': 'x'}, Server, fields={'id'})
+
+    with assert_raises(ValueError):
+        unmarshal(DATA, Server, lazy=True, fields={'id'})
+
+
+@pytest.mark.parametrize('data, type_hint, fields, unknown', [
+    (DATA, Server, {'idd'}, 'idd'),
+    ([DATA], List[Server], {'id', 'public_net.ipv4.address'}, 'public_net.ipv4.address'),
+    ([], List[Server], {'nope'}, 'nope'),
+    (None, Optional[Server], {'nope'}, 'nope'),
+    ({}, Dict[str, Server], {'id.x', 'labels.a'}, 'id.x, labels.a'),
+    (DATA, Server, {'history.ipv4.ip.x'}, 'history.ipv4.ip.x'),
+    (1, int, {'id'}, 'id'),
+])
+def test_unmarshal_projection_unknown_fields(data, type_hint, fields, unknown):
+    with assert_raises(ValueError, match=': %s$' % unknown):
+        unmarshal(data, type_hint, fields=fields)
+
+
+def test_unmarshal_projection_union_fields():
+    assert unmarshal([], List[Union[Server, PublicNet]], fields={'id', 'ipv4.ip'}) == []
+    with assert_raises(ValueError):
+        unmarshal([], List[Union[Server, PublicNet]], fields={'id', 'ipv4.nope'})
+
+
+@pytest.mark.parametrize('data, type_hint', [
+    (None, Optional[Server]),
+    ([], List[Server]),
+])
+def test_unmarshal_projection_other_types(data, type_hint):
+    assert unmarshal(data, type_hint, fields={'id'}) == data
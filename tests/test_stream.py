@@ -0,0 +1,94 @@
+import io
+import json
+from typing import Any, List
+
+import pytest
+from pytest import raises as assert_raises
+from fieldmarshal import iter_unmarshal, marshal_json, struct
+
+
+@struct
+class Foo:
+    id: int
+    tags: List[str]
+
+
+FOOS = [Foo(i, ['x' * i, '"]\\[,']) for i in range(50)]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 65536])
+@pytest.mark.parametrize('binary', [False, True])
+def test_iter_unmarshal_array(chunk_size, binary):
+    data = ' \n' + marshal_json(FOOS).replace(', ', ',\n  ') + '\n'
+    fp = io.BytesIO(data.encode('utf-8')) if binary else io.StringIO(data)
+    assert list(iter_unmarshal(fp, Foo, chunk_size=chunk_size)) == FOOS
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 65536])
+@pytest.mark.parametrize('binary', [False, True])
+def test_iter_unmarshal_lines(chunk_size, binary):
+    data = ''.join(marshal_json(foo) + '\n' for foo in FOOS) + '\n'
+    fp = io.BytesIO(data.encode('utf-8')) if binary else io.StringIO(data)
+    assert list(iter_unmarshal(fp, Foo, chunk_size=chunk_size)) == FOOS
+
+
+@pytest.mark.parametrize('data, format, result', [
+    ('', 'auto', []),
+    ('[]', 'auto', []),
+    ('[1, 22, 333]', 'auto', [1, 22, 333]),
+    ('[1, 22, 333]', 'lines', [[1, 22, 333]]),
+    ('[1]\n[2]', 'lines', [[1], [2]]),
+    ('1\n2\n3', 'auto', [1, 2, 3]),
+    ('"ü"\r\n', 'auto', ['ü']),
+    (' \n \n', 'auto', []),
+    (' \n 1\n2', 'auto', [1, 2]),
+])
+def test_iter_unmarshal_format(data, format, result):
+    fp = io.BytesIO(data.encode('utf-8'))
+    assert list(iter_unmarshal(fp, Any, format=format, chunk_size=1)) == result
+
+
+@pytest.mark.parametrize('format', ['array', 'lines'])
+def test_iter_unmarshal_long_value(format):
+    values = [{'x': 'a' * 100000}, {'x': 'b'}, {'x': 'c' * 50000}]
+    if format == 'array':
+        data = marshal_json(values)
+    else:
+        data = ''.join(marshal_json(value) + '\n' for value in values)
+    fp = io.StringIO(data)
+    assert list(iter_unmarshal(fp, Any, format=format, chunk_size=100)) == values
+
+
+@pytest.mark.parametrize('data, format', [
+    ('[1, 2', 'auto'),
+    ('[1, 2,]', 'auto'),
+    ('[1 2]', 'auto'),
+    ('[1] 2', 'auto'),
+    ('1', 'array'),
+    ('', 'array'),
+    ('{"a": 1\n}', 'lines'),
+])
+def test_iter_unmarshal_invalid(data, format):
+    with assert_raises(ValueError):
+        list(iter_unmarshal(io.StringIO(data), Any, format=format, chunk_size=2))
+
+
+def test_iter_unmarshal_type_error():
+    with assert_raises(TypeError):
+        list(iter_unmarshal(io.StringIO('[1, "a"]'), int))
+
+
+
+@pytest.mark.parametrize('number', ['1', '-12', '1.5', '1e5', '1E+5', '-1.25e-10', '0'])
+def test_iter_unmarshal_split_number(number):
+    # Every chunk size splits the numbers at every offset somewhere.
+    data = '[%s]' % ', '.join([number] * 20)
+    expected = json.loads(data)
+    for chunk_size in range(1, len(data) + 1):
+        fp = io.StringIO(data)
+        assert list(iter_unmarshal(fp, Any, chunk_size=chunk_size)) == expected
+
+
+def test_iter_unmarshal_many_numbers():
+    fp = io.StringIO('[' + ', '.join(['1e5'] * 50000) + ']')
+    assert list(iter_unmarshal(fp, float)) == [1e5] * 50000
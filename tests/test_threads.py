@@ -0,0 +1,164 @@
+import sys
+import threading
+from contextlib import contextmanager
+from enum import Enum
+from typing import Dict, List, Optional
+
+from fieldmarshal import Registry, struct
+
+THREADS = 8
+ITERATIONS = 100
+
+
+class Color(Enum):
+    RED = 'red'
+    BLUE = 'blue'
+
+
+@struct
+class Point:
+    x: int
+    y: int
+
+
+@struct
+class Shape:
+    name: str
+    color: Color
+    points: List[Point]
+    labels: Dict[str, int]
+    parent: Optional[Point] = None
+
+
+class Opaque:
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return isinstance(other, Opaque) and other.value == self.value
+
+
+@struct
+class Wrapper:
+    opaque: Opaque
+
+
+SHAPE = Shape('s', Color.RED, [Point(1, 2), Point(3, 4)], {'a': 1}, Point(5, 6))
+SHAPE_DATA = {
+    'name': 's',
+    'color': 'red',
+    'points': [{'x': 1, 'y': 2}, {'x': 3, 'y': 4}],
+    'labels': {'a': 1},
+    'parent': {'x': 5, 'y': 6},
+}
+
+
+@contextmanager
+def switch_often():
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    try:
+        yield
+    finally:
+        sys.setswitchinterval(interval)
+
+
+def hammer(fn, threads=THREADS):
+    """
+    Run *fn(i)* for all iterations in *threads* threads started at the same
+    time, and re-raise the first error.
+    """
+    barrier = threading.Barrier(threads)
+    errors = []
+
+    def run():
+        barrier.wait()
+        try:
+            for i in range(ITERATIONS):
+                fn(i)
+        except BaseException as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    with switch_often():
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    if errors:
+        raise errors[0]
+
+
+def check_roundtrip(r):
+    def roundtrip(i):
+        assert r.marshal(SHAPE) == SHAPE_DATA
+        assert r.unmarshal(SHAPE_DATA, Shape) == SHAPE
+        assert r.unmarshal([SHAPE_DATA], List[Shape], lazy=i % 2 == 0) == [SHAPE]
+        assert r.unmarshal(SHAPE_DATA, Shape, fields={'points.x'}).points[1].x == 3
+        assert r.unmarshal_json(r.marshal_json([SHAPE]), List[Shape]) == [SHAPE]
+    return roundtrip
+
+
+def test_threads_shared_registry():
+    hammer(check_roundtrip(Registry()))
+
+
+def test_threads_bounded_cache():
+    r = Registry(cache_size=3)
+    hammer(check_roundtrip(r))
+    info = r.cache_info()
+    assert info['marshal'].size <= 3
+    assert info['unmarshal'].size <= 3
+
+
+def test_threads_clear_cache():
+    r = Registry()
+    roundtrip = check_roundtrip(r)
+
+    def run(i):
+        if i % 10 == 0:
+            r.clear_cache()
+        roundtrip(i)
+
+    hammer(run)
+
+
+def test_threads_profiling():
+    r = Registry()
+    r.enable_profiling()
+    hammer(lambda i: r.marshal(SHAPE))
+    entries = {(e.operation, e.type_): e for e in r.profile_snapshot()}
+    assert entries['marshal', Shape].calls == THREADS * ITERATIONS
+    assert entries['marshal', Point].calls == THREADS * ITERATIONS * 3
+
+
+def test_threads_add_hook():
+    # Hooks are added while other threads marshal the same types. Once a hook
+    # is registered, every call that starts afterwards must use it.
+    r = Registry()
+    lock = threading.Lock()
+    added = threading.Event()
+
+    def run(i):
+        if i == ITERATIONS // 2:
+            with lock:
+                if not added.is_set():
+                    r.add_marshal_hook(Opaque, lambda o: o.value)
+                    r.add_unmarshal_hook(Opaque, lambda v: Opaque(v))
+                    added.set()
+        hooked = added.is_set()
+        try:
+            result = r.marshal(Wrapper(Opaque(i)))
+        except TypeError:
+            assert not hooked
+        else:
+            assert result == {'opaque': i}
+        try:
+            result = r.unmarshal({'opaque': i}, Wrapper)
+        except TypeError:
+            assert not hooked
+        else:
+            assert result == Wrapper(Opaque(i))
+
+    hammer(run)
+    assert r.marshal(Wrapper(Opaque(1))) == {'opaque': 1}
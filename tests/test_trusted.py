@@ -0,0 +1,133 @@
+from enum import Enum
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Union
+
+import attr
+import pytest
+from pytest import raises as assert_raises
+from fieldmarshal import Registry, UnmarshalError, field, struct, unmarshal, unmarshal_json
+
+
+class Color(Enum):
+    RED = 'red'
+
+
+@struct
+class Point:
+    x: int
+    y: int = attr.ib(validator=attr.validators.instance_of(int))
+
+
+@struct(frozen=True)
+class Node:
+    value: int
+    children: List['Node'] = attr.Factory(list)
+    parent: Optional['Node'] = None
+
+
+attr.resolve_types(Node)
+
+
+@struct
+class Everything:
+    name: str = field('Name')
+    point: Optional[Point] = None
+    points: List[Point] = attr.Factory(list)
+    by_id: Dict[int, Point] = attr.Factory(dict)
+    by_name: Dict[str, int] = attr.Factory(dict)
+    pair: Tuple[int, Point] = (0, Point(0, 0))
+    tags: FrozenSet[str] = frozenset()
+    color: Color = Color.RED
+    either: Union[int, str] = 0
+    raw: Any = None
+    upper: str = field(default='', unmarshal=str.upper)
+    omitted: int = field(default=7, omit=True)
+    count: int = attr.ib(default=attr.Factory(lambda self: len(self.points), takes_self=True))
+
+
+@attr.s
+class Plain:
+    a = attr.ib()
+    b = attr.ib(default=2)
+
+
+EVERYTHING = {
+    'Name': 'e',
+    'point': {'x': 1, 'y': 2},
+    'points': [{'x': 3, 'y': 4}],
+    'by_id': {'5': {'x': 5, 'y': 5}},
+    'by_name': {'a': 1},
+    'pair': [1, {'x': 6, 'y': 6}],
+    'tags': ['a', 'b'],
+    'color': 'red',
+    'either': 'x',
+    'raw': {'any': ['thing']},
+    'upper': 'abc',
+}
+
+
+def test_trusted_same_result():
+    assert unmarshal(EVERYTHING, Everything, trusted=True) == unmarshal(EVERYTHING, Everything)
+
+
+def test_trusted_defaults():
+    obj = unmarshal({'Name': 'e', 'points': [{'x': 1, 'y': 2}]}, Everything, trusted=True)
+    assert obj == Everything('e', points=[Point(1, 2)])
+    assert obj.omitted == 7
+    assert obj.count == 1
+
+
+def test_trusted_frozen_recursive():
+    data = {'value': 1, 'children': [{'value': 2, 'parent': {'value': 3}}]}
+    assert unmarshal(data, Node, trusted=True) == unmarshal(data, Node)
+
+
+def test_trusted_dict_class():
+    assert unmarshal({'a': 1}, Plain, trusted=True) == Plain(1, 2)
+
+
+def test_trusted_no_validation():
+    point = unmarshal({'x': 'not an int', 'y': 'neither'}, Point, trusted=True)
+    assert point.x == 'not an int'
+    assert point.y == 'neither'
+    with assert_raises(UnmarshalError):
+        unmarshal({'x': 'not an int', 'y': 'neither'}, Point)
+
+
+def test_trusted_missing_key():
+    with assert_raises(UnmarshalError, match="missing key: 'y'"):
+        unmarshal({'x': 1}, Point, trusted=True)
+
+
+@pytest.mark.parametrize('type_hint, data, result', [
+    (int, 1, 1),
+    (List[int], [1, 2], [1, 2]),
+    (Optional[Point], None, None),
+    (List[Optional[Point]], [None, {'x': 1, 'y': 2}], [None, Point(1, 2)]),
+    (Dict[str, List[int]], {'a': [1]}, {'a': [1]}),
+    (Tuple[int, ...], [1, 2], (1, 2)),
+    (Color, 'red', Color.RED),
+])
+def test_trusted_types(type_hint, data, result):
+    assert unmarshal(data, type_hint, trusted=True) == result
+
+
+def test_trusted_json():
+    assert unmarshal_json('[{"x": 1, "y": 2}]', List[Point], trusted=True) == [Point(1, 2)]
+
+
+def test_trusted_hooks():
+    r = Registry()
+    r.add_unmarshal_hook(Point, lambda s: Point(*map(int, s.split(','))))
+    assert r.unmarshal(['1,2'], List[Point], trusted=True) == [Point(1, 2)]
+
+    r = Registry()
+    assert r.unmarshal({'x': 1, 'y': 2}, Point, trusted=True) == Point(1, 2)
+    r.add_unmarshal_hook(Point, lambda s: Point(0, 0))
+    assert r.unmarshal({'x': 1, 'y': 2}, Point, trusted=True) == Point(0, 0)
+
+
+def test_trusted_combined():
+    with assert_raises(ValueError):
+        unmarshal({}, Point, trusted=True, lazy=True)
+    with assert_raises(ValueError):
+        unmarshal({}, Point, trusted=True, fields={'x'})
@@ -1,6 +1,7 @@
-from typing import Optional, Union
+import pickle
+from typing import List, Optional, Union
 
-from fieldmarshal import Registry, Hook, struct, unmarshal
+from fieldmarshal import Registry, Hook, UnmarshalError, field, struct, unmarshal
 from pytest import raises as assert_raises
 
 
@@ -91,3 +92,126 @@ def test_cant_unmarshal_union_types_having_hook():
 
     assert r.unmarshal(None, Optional[Union[int, Foo]]) is None
     assert r.unmarshal(None, Optional[Union[int, FooSubclass]]) is None
+
+
+@struct
+class Created:
+    id: int
+
+
+@struct
+class Deleted:
+    id: int
+    reason: str = ''
+
+
+@struct
+class Renamed:
+    type: str
+    name: str
+
+
+Event = Union[Created, Deleted, Renamed]
+
+
+def test_tagged_union():
+    r = Registry()
+    r.add_tagged_union(Event, 'type', {'created': Created, 'deleted': Deleted, 'renamed': Renamed})
+
+    assert r.marshal(Created(1)) == {'type': 'created', 'id': 1}
+    assert r.marshal(Renamed('renamed', 'x')) == {'type': 'renamed', 'name': 'x'}
+    assert ''.join(r.iter_marshal_json([Deleted(2)])) == r.marshal_json([Deleted(2)])
+
+    assert r.unmarshal({'type': 'created', 'id': 1}, Event) == Created(1)
+    assert r.unmarshal({'type': 'deleted', 'id': 2}, Event) == Deleted(2)
+    assert r.unmarshal({'type': 'renamed', 'name': 'x'}, Event) == Renamed('renamed', 'x')
+    assert r.unmarshal(None, Optional[Event]) is None
+    assert r.unmarshal({'type': 'created', 'id': 1}, Optional[Event]) == Created(1)
+
+    events = [Created(1), Deleted(2, 'x')]
+    assert r.unmarshal(r.marshal(events), List[Event]) == events
+
+    with assert_raises(UnmarshalError, match='missing key'):
+        r.unmarshal({'id': 1}, Event)
+
+    with assert_raises(UnmarshalError, match='Unknown tag'):
+        r.unmarshal({'type': 'foo', 'id': 1}, Event)
+
+    with assert_raises(UnmarshalError):
+        r.unmarshal([], Event)
+
+
+def test_tagged_union_optional():
+    r = Registry()
+    r.add_tagged_union(Optional[Union[Created, Deleted]], 'type', {'c': Created, 'd': Deleted})
+    assert r.unmarshal(None, Optional[Union[Created, Deleted]]) is None
+    assert r.unmarshal({'type': 'd', 'id': 2}, Optional[Union[Created, Deleted]]) == Deleted(2)
+    assert r.unmarshal([None], List[Optional[Union[Created, Deleted]]], trusted=True) == [None]
+    with assert_raises(UnmarshalError):
+        r.unmarshal(None, Union[Created, Deleted])
+
+
+def test_tagged_union_invalid():
+    r = Registry()
+    with assert_raises(ValueError):
+        r.add_tagged_union(Union[Created, Deleted], 'type', {'created': Created})
+
+    r.add_tagged_union(Union[Created, Deleted], 'type', {'c': Created, 'd': Deleted})
+    with assert_raises(ValueError):
+        r.add_tagged_union(Union[Created, Deleted], 'kind', {'c': Created, 'd': Deleted})
+
+
+def test_tagged_union_pickle():
+    r = Registry()
+    r.add_tagged_union(Event, 'type', {'created': Created, 'deleted': Deleted, 'renamed': Renamed})
+    r = pickle.loads(pickle.dumps(r))
+    assert r.marshal(Created(1)) == {'type': 'created', 'id': 1}
+    assert r.unmarshal({'type': 'deleted', 'id': 2}, Event) == Deleted(2)
+
+
+@struct
+class Circle:
+    radius: float
+    name: str = ''
+
+
+@struct
+class Rect:
+    width: float
+    height: float = field('h')
+    name: str = ''
+
+
+@struct
+class Square:
+    width: float
+
+
+def test_resolve_union_by_shape():
+    r = Registry(resolve_unions_by_shape=True)
+    Shape = Union[Circle, Rect, Square]
+
+    assert r.unmarshal({'radius': 1.0}, Shape) == Circle(1.0)
+    assert r.unmarshal({'radius': 1.0, 'name': 'x'}, Shape) == Circle(1.0, 'x')
+    assert r.unmarshal({'width': 1.0, 'h': 2.0}, Shape) == Rect(1.0, 2.0)
+    assert r.unmarshal({'width': 1.0}, Shape) == Square(1.0)
+    assert r.unmarshal({'width': 1.0, 'extra': 1}, Shape) == Square(1.0)
+    assert r.unmarshal([{'radius': 1.0}, {'width': 2.0}], List[Optional[Shape]]) == [
+        Circle(1.0), Square(2.0)]
+    assert r.unmarshal(1, Union[int, Circle, Rect]) == 1
+
+    with assert_raises(UnmarshalError, match='no member'):
+        r.unmarshal({'name': 'x'}, Shape)
+
+    @struct
+    class OtherSquare:
+        width: float
+
+    with assert_raises(UnmarshalError, match='match'):
+        r.unmarshal({'width': 1.0}, Union[Square, OtherSquare])
+
+    with assert_raises(TypeError):
+        Registry().unmarshal({'radius': 1.0}, Shape)
+
+    r = pickle.loads(pickle.dumps(r))
+    assert r.unmarshal({'radius': 1.0}, Shape) == Circle(1.0)
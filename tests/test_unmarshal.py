@@ -91,3 +91,72 @@ def test_unmarshal_validate_typing():
 
     with assert_raises(TypeError):
         unmarshal({'a': 1}, List[str, str])
+
+
+def test_unmarshal_struct_optional_scalar():
+    @struct
+    class Foo:
+        a: Optional[int]
+        b: float = 0.0
+
+    assert unmarshal({'a': None}, Foo) == Foo(None)
+    assert unmarshal({'a': 1, 'b': 0.5}, Foo) == Foo(1, 0.5)
+
+    with assert_raises(TypeError):
+        unmarshal({'a': 'x'}, Foo)
+
+    with assert_raises(TypeError):
+        unmarshal({'a': 1, 'b': 1}, Foo)
+
+    with assert_raises(TypeError):
+        unmarshal([1], Foo)
+
+
+def test_unmarshal_struct_hook_added_later():
+    @struct
+    class Foo:
+        value: int
+
+    r = Registry()
+    assert r.unmarshal({'value': 1}, Foo) == Foo(1)
+
+    r.add_unmarshal_hook(int, lambda v: v + 1)
+    assert r.unmarshal({'value': 1}, Foo) == Foo(2)
+
+
+@pytest.mark.parametrize('value, type_hint, result', [
+    ([], List[int], []),
+    ([1, True, 2], List[int], [1, True, 2]),
+    ([1, None], List[Optional[int]], [1, None]),
+    ([None, None], Tuple[Optional[int], ...], (None, None)),
+    ([{'a': 1}, {}], List[Dict[str, int]], [{'a': 1}, {}]),
+    ({'a': [1], 'b': None}, Dict[str, Optional[List[int]]], {'a': [1], 'b': None}),
+])
+def test_unmarshal_list_mixed(value, type_hint, result):
+    assert unmarshal(value, type_hint) == result
+
+
+def test_unmarshal_list_mixed_error():
+    with assert_raises(TypeError):
+        unmarshal([1, 'a'], List[int])
+
+    with assert_raises(TypeError):
+        unmarshal({'a': 1, 'b': 'x'}, Dict[str, int])
+
+
+def test_unmarshal_kw_only():
+    @attr.s(kw_only=True)
+    class K:
+        a = attr.ib()
+        b = attr.ib(default=2)
+
+    @attr.s
+    class F:
+        a = attr.ib()
+        b = attr.ib(kw_only=True, default=2)
+        c = attr.ib(default=3)
+
+    assert unmarshal({'a': 1}, K) == K(a=1, b=2)
+    assert unmarshal({'a': 1, 'b': 3}, K) == K(a=1, b=3)
+    assert unmarshal({'a': 1}, F) == F(1, b=2, c=3)
+    assert unmarshal({'a': 1, 'b': 4, 'c': 5}, F) == F(1, b=4, c=5)